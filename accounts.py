@@ -0,0 +1,154 @@
+import threading
+import time
+
+import db
+from batch_writer import BatchWriter
+
+# Awards are queued and written in one transaction every FLUSH_INTERVAL seconds
+# (or every FLUSH_SIZE awards), so concurrent sessions don't each wait on the
+# SQLite write lock
+FLUSH_INTERVAL = 0.5
+FLUSH_SIZE = 200
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def _init_schema():
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        conn = db.get_connection()
+        with db.lock:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT UNIQUE COLLATE NOCASE,
+                    created_at REAL,
+                    last_seen REAL
+                );
+                -- Append-only: one row per award, never updated
+                CREATE TABLE IF NOT EXISTS points_ledger (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER REFERENCES users (id),
+                    points INTEGER,
+                    reason TEXT,
+                    created_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_points_ledger_user ON points_ledger (user_id, created_at);
+                -- Running totals, so reading a user's points never sums the ledger
+                CREATE TABLE IF NOT EXISTS user_totals (
+                    user_id INTEGER PRIMARY KEY REFERENCES users (id),
+                    points INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_user_totals_points ON user_totals (points DESC);
+            """)
+            conn.commit()
+        _schema_ready = True
+
+
+class AwardWriter(BatchWriter):
+    def __init__(self, flush_interval=FLUSH_INTERVAL, flush_size=FLUSH_SIZE):
+        # Points queued but not written yet, added to reads so a user sees
+        # their award immediately
+        self.pending = {}
+        self._pending_lock = threading.Lock()
+        super().__init__("award-writer", flush_interval, flush_size)
+
+    def award(self, user_id, points, reason):
+        with self._pending_lock:
+            self.pending[user_id] = self.pending.get(user_id, 0) + points
+        self.put((user_id, points, reason, time.time()))
+
+    def write(self, events):
+        totals = {}
+        for user_id, points, _, created_at in events:
+            total, _ = totals.get(user_id, (0, 0))
+            totals[user_id] = (total + points, created_at)
+
+        conn = db.get_connection()
+        # `with conn` rolls the batch back if either insert fails, otherwise the
+        # next commit on the shared connection would persist half of it
+        with db.lock, conn:
+            conn.executemany(
+                "INSERT INTO points_ledger (user_id, points, reason, created_at) VALUES (?, ?, ?, ?)", events
+            )
+            conn.executemany(
+                "INSERT INTO user_totals (user_id, points, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET points = points + excluded.points, "
+                "updated_at = excluded.updated_at",
+                [(user_id, points, updated_at) for user_id, (points, updated_at) in totals.items()],
+            )
+        self._settle(events)
+
+    def failed(self, events):
+        # Not written, so stop showing these points instead of counting them forever
+        self._settle(events)
+
+    def _settle(self, events):
+        with self._pending_lock:
+            for user_id, points, _, _ in events:
+                self.pending[user_id] -= points
+                if not self.pending[user_id]:
+                    del self.pending[user_id]
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _init_schema()
+                _writer = AwardWriter()
+    return _writer
+
+
+# --------------------------- PUBLIC API -----------------------------
+
+def login(name):
+    """The id of the user called `name`, created on first login."""
+    _init_schema()
+    now = time.time()
+    db.execute(
+        "INSERT INTO users (name, created_at, last_seen) VALUES (?, ?, ?) "
+        "ON CONFLICT (name) DO UPDATE SET last_seen = excluded.last_seen",
+        (name, now, now),
+    )
+    return db.query_one("SELECT id FROM users WHERE name = ?", (name,))[0]
+
+
+def award(user_id, points, reason):
+    get_writer().award(user_id, points, reason)
+
+
+def get_points(user_id):
+    _init_schema()
+    row = db.query_one("SELECT points FROM user_totals WHERE user_id = ?", (user_id,))
+    return (row[0] if row else 0) + get_writer().pending.get(user_id, 0)
+
+
+def leaderboard(limit=5):
+    """Top users by points, read from the points index."""
+    _init_schema()
+    return db.query(
+        "SELECT u.name, t.points FROM user_totals t JOIN users u ON u.id = t.user_id "
+        "ORDER BY t.points DESC LIMIT ?",
+        (limit,),
+    )
+
+
+def history(user_id, limit=20):
+    _init_schema()
+    return db.query(
+        "SELECT points, reason, created_at FROM points_ledger WHERE user_id = ? "
+        "ORDER BY created_at DESC LIMIT ?",
+        (user_id, limit),
+    )
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import db
+from batch_writer import BatchWriter
+from waste_data import disposal_methods
+
+HOUR = 3600
+DAY = 86400
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def _init_schema():
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        conn = db.get_connection()
+        with db.lock:
+            conn.executescript("""
+                -- Raw log, one row per prediction. Only ever appended to, never read by the UI
+                CREATE TABLE IF NOT EXISTS prediction_events (
+                    id INTEGER PRIMARY KEY,
+                    ts REAL,
+                    predicted_class TEXT,
+                    waste_type TEXT,
+                    confidence REAL,
+                    language TEXT
+                );
+                -- Counts per hour/day bucket, updated with every batch of events
+                CREATE TABLE IF NOT EXISTS prediction_rollups (
+                    period TEXT,
+                    bucket INTEGER,
+                    waste_type TEXT,
+                    disposal_method TEXT,
+                    predictions INTEGER NOT NULL,
+                    confidence_sum REAL NOT NULL,
+                    -- Events without a probability vector don't count towards the mean
+                    confidence_count INTEGER NOT NULL,
+                    PRIMARY KEY (period, bucket, waste_type, disposal_method)
+                ) WITHOUT ROWID;
+            """)
+            conn.commit()
+        _schema_ready = True
+
+
+class EventWriter(BatchWriter):
+    def write(self, events):
+        rollups = {}
+        for ts, _, waste_type, confidence, _ in events:
+            disposal_method = disposal_methods.get(waste_type, "Unknown")
+            for period, size in (("hour", HOUR), ("day", DAY)):
+                key = (period, int(ts // size) * size, waste_type, disposal_method)
+                count, confidence_sum, confidence_count = rollups.get(key, (0, 0.0, 0))
+                if confidence is not None:
+                    confidence_sum += confidence
+                    confidence_count += 1
+                rollups[key] = (count + 1, confidence_sum, confidence_count)
+
+        conn = db.get_connection()
+        # Both tables or neither, a failed batch must not ride on the next commit
+        with db.lock, conn:
+            conn.executemany(
+                "INSERT INTO prediction_events (ts, predicted_class, waste_type, confidence, language) "
+                "VALUES (?, ?, ?, ?, ?)",
+                events,
+            )
+            conn.executemany(
+                "INSERT INTO prediction_rollups VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (period, bucket, waste_type, disposal_method) DO UPDATE SET "
+                "predictions = predictions + excluded.predictions, "
+                "confidence_sum = confidence_sum + excluded.confidence_sum, "
+                "confidence_count = confidence_count + excluded.confidence_count",
+                [key + value for key, value in rollups.items()],
+            )
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _init_schema()
+                _writer = EventWriter("prediction-event-writer")
+    return _writer
+
+
+def log_prediction(predicted_class, waste_type, confidence=None, language="en"):
+    """Queue one prediction event, never blocks on the database."""
+    get_writer().put((time.time(), predicted_class, waste_type, confidence, language))
+
+
+def rollups(period="day", since=None):
+    """(bucket, waste_type, disposal_method, predictions, confidence_sum, confidence_count) rows."""
+    _init_schema()
+    if since is None:
+        since = time.time() - (30 * DAY if period == "day" else 2 * DAY)
+    size = DAY if period == "day" else HOUR
+    return db.query(
+        "SELECT bucket, waste_type, disposal_method, predictions, confidence_sum, confidence_count "
+        "FROM prediction_rollups "
+        "WHERE period = ? AND bucket >= ? ORDER BY bucket",
+        (period, int(since // size) * size),
+    )
@@ -1,196 +1,75 @@
 import streamlit as st
-import sqlite3
-import requests
 import pandas as pd
 import numpy as np
 from PIL import Image
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
 import streamlit.components.v1 as components
-import base64
-from googletrans import Translator
+import hmac
 import os  # ✅ Add this line
-import sys
-import gdown
+import time
+import accounts
+import analytics
+import assets
+import corrections
+import embedding_index
+import head_tuning
+import model_registry
+import predictor
+import prediction_cache
+import profiling
+import session_store
+from batch_predict import classify_stream, classify_stream_remote, iter_sources
+from service_client import get_client
 
 st.set_page_config(page_title="Smart Waste App", layout="centered")
 
+# Per-stage timings, only collected with SWM_PROFILING=1
+rerun_start = time.perf_counter()
+profiling.start_metrics_server()
+# Logged-in names that may open the profiling panel, e.g. ADMIN_USERS="Ana,Ravi".
+# The login prompt takes any name without a password, so the panel also asks for
+# ADMIN_PASSWORD (environment, or admin_password in .streamlit/secrets.toml) and
+# stays closed while none is configured
+ADMIN_USERS = {name.strip().lower() for name in os.environ.get("ADMIN_USERS", "").split(",") if name.strip()}
+
+
+def admin_password():
+    if os.environ.get("ADMIN_PASSWORD"):
+        return os.environ["ADMIN_PASSWORD"]
+    try:
+        return st.secrets.get("admin_password")
+    except Exception:
+        # No secrets.toml
+        return None
+
+# Model file, resolved from disk or the local artifact cache and checked
+# against artifacts.json (see artifacts.py)
+output_path = "DenseNet201.keras"
+
+# With INFERENCE_SERVICE_URL set, predictions come from inference_service.py
+# and this process never loads the model
+inference_client = get_client()
+
+# TensorFlow import and model load run in a background thread, so the login
+# view is interactive while the model loads. No-op once loaded
+if inference_client is None:
+    model_registry.preload(keras_path=output_path)
 
 
-def get_base64_bg(file_path):
-    with open(file_path, "rb") as f:
-        data = f.read()
-    return base64.b64encode(data).decode()
 
-bg_image = get_base64_bg("background.avif")
 # 💫 Custom Background and Styling
 # Toggle for Dark Mode
 dark_mode = st.sidebar.checkbox("🌗 Dark Mode", value=False)
 
+# CSS Styling, built once per process. The background is served from static/
+# (see .streamlit/config.toml) instead of being inlined into every rerun
+with profiling.stage("background_css"):
+    st.markdown(assets.page_css(dark_mode, st.get_option("server.enableStaticServing")), unsafe_allow_html=True)
+
 
-# CSS Styling
-page_bg = f"""
-<style>
-/* Background image */
-[data-testid="stAppViewContainer"] {{
-    background-image: url("data:image/avif;base64,{bg_image}");
-    background-size: cover;
-    background-position: center;
-    background-repeat: no-repeat;
-    background-attachment: fixed;
-}}
-
-
-
-/* Main card blur and transparency */
-[data-testid="stAppViewContainer"] > .main {{
-    backdrop-filter: blur(6px);
-    background-color: {'rgba(25, 25, 25, 0.5)' if dark_mode else 'rgba(255, 255, 255, 0.65)'};
-    border-radius: 20px;
-    padding: 2rem;
-    margin: 2rem;
-    color: {'#fff' if dark_mode else '#000'};
-}}
-
-
-
-/* Custom scrollbar */
-[data-testid="stAppViewContainer"]::-webkit-scrollbar {{
-    width: 8px;
-}}
- /* Custom sidebar toggle */
-[data-testid="stSidebar"] {{
-    background-color: {'rgba(0, 0, 0, 0.5)' if dark_mode else 'rgba(255, 255, 255, 0.8)'};
-    backdrop-filter: blur(6px);
-    color: {'#fff' if dark_mode else '#000'};
-}}
-/* Headings */
-h1, h2, h3 {{
-    color: {'#90ee90' if dark_mode else '#2E8B57'};
-    text-shadow: 1px 1px 3px #00000040;
-}}
-
-/* Sidebar */
-section[data-testid="stSidebar"] {{
-    background: linear-gradient(135deg, #E0F7FA 0%, #FFF9C4 100%);
-    color: black;
-    border-right: 2px solid #ddd;
-}}
-
-section[data-testid="stSidebar"] h1, 
-section[data-testid="stSidebar"] h2, 
-section[data-testid="stSidebar"] h3 {{
-    color: black;
-}}
-
-/* Form labels */
-label, .stTextInput label {{
-    color: {'white' if dark_mode else 'black'} !important;
-    text-shadow: 1px 1px 2px rgba(0,0,0,0.2);
-    font-weight: 500;
-    font-size: 16px;
-}}
-
-/* --- Prediction Box --- */
-.prediction-box {{
-    background: linear-gradient(135deg, #e0f7fa, #ffffff);
-    color: #004d40;
-    border: 2px solid #26a69a;
-    padding: 15px;
-    border-radius: 12px;
-    font-weight: bold;
-    text-align: center;
-    margin-top: 20px;
-    box-shadow: 0 4px 12px rgba(0, 150, 136, 0.2);
-    transition: all 0.3s ease-in-out;
-}}
-
-.prediction-box:hover {{
-    box-shadow: 0 0 20px 4px rgba(0, 150, 136, 0.3);
-    transform: scale(1.02);
-}}
-
-.dark .prediction-box {{
-    background: #263238;
-    color: #80cbc4;
-    border: 2px solid #4db6ac;
-    box-shadow: 0 0 20px 2px rgba(38, 166, 154, 0.3);
-}}
-
-/* --- Community Forum Box --- */
-.community-box {{
-    background: linear-gradient(145deg, #f1f8e9, #ffffff);
-    border: 2px solid #aed581;
-    border-radius: 16px;
-    padding: 20px;
-    margin-top: 25px;
-    box-shadow: 0 4px 12px rgba(139, 195, 74, 0.25);
-    transition: all 0.3s ease-in-out;
-}}
-
-.community-box:hover {{
-    transform: scale(1.01);
-    box-shadow: 0 6px 18px rgba(139, 195, 74, 0.3);
-}}
-
-.dark .community-box {{
-    background: #1c2e1b;
-    border: 2px solid #9ccc65;
-    box-shadow: 0 6px 20px rgba(139, 195, 74, 0.4);
-    color: #dcedc8;
-}}
-
-/* --- Warning Message --- */
-.warning-msg {{
-    color: #b00020;
-    font-size: 15px;
-    font-weight: 600;
-    margin-top: 10px;
-    text-align: center;
-    background-color: rgba(255, 235, 238, 0.8);
-    border: 1px solid #ffcdd2;
-    border-radius: 8px;
-    padding: 8px 12px;
-}}
-
-.dark .warning-msg {{
-    color: #ff8a80;
-    background-color: rgba(75, 0, 0, 0.7);
-    border: 1px solid #ff5252;
-}}
-
-
-/* --- Buttons --- */
-.stButton > button {{
-    background-color: {'#90ee90' if dark_mode else '#2E8B57'};
-    color: {'black' if dark_mode else 'white'};
-    font-weight: bold;
-    border-radius: 10px;
-    padding: 10px 20px;
-    transition: background-color 0.3s ease;
-}}
-
-.stButton > button:hover {{
-    background-color: {'#77dd77' if dark_mode else '#3CB371'};
-}}
-</style>
-"""
-
-st.markdown(page_bg, unsafe_allow_html=True)
-
-
-
-# Initialize translator
-translator = Translator()
-
-# Define translation function
-def translate(text, dest_lang="en"):
-    try:
-        if dest_lang != "en":
-            return translator.translate(text, dest=dest_lang).text
-        return text
-    except:
-        return text
+
+# Translations are cached (memory + SQLite); misses show the original text and
+# are translated in one batched call at the end of the rerun
+from translation import translate, translate_many, flush_pending
 
 # Language selection
 language_options = {
@@ -232,6 +111,10 @@ if not st.session_state.logged_in:
             st.rerun()
         else:
             st.warning(translate("Please enter a valid name to proceed.", dest_lang))
+    flush_pending()
+    profiling.mark_first_paint()
+    if profiling.ENABLED:
+        profiling.record("rerun_login", time.perf_counter() - rerun_start)
     st.stop()
 
 # ------------------------ POST LOGIN VIEW -------------------------
@@ -259,10 +142,15 @@ def play_reward_sound():
     st.markdown(sound_html, unsafe_allow_html=True)
 
 
+def award_points(points, reason):
+    st.session_state["user_points"] += points
+    # Written to the points ledger in the background, batched with other sessions
+    accounts.award(st.session_state["user_id"], points, reason)
+
+
 
 # Initialize session state variables
 for key, default in {
-    "uploaded_file": None,
     "predicted_class": None,
     "waste_type": None,
     "disposal_method": None,
@@ -273,105 +161,86 @@ for key, default in {
     if key not in st.session_state:
         st.session_state[key] = default
 
+# Points are stored per user in the database, so they survive logout and refresh
+if "user_id" not in st.session_state:
+    st.session_state["user_id"] = accounts.login(st.session_state.user_name)
+    st.session_state["user_points"] = accounts.get_points(st.session_state["user_id"])
+
+# Uploads live in the process-wide session store, session state only holds the key
+if "session_key" not in st.session_state:
+    st.session_state["session_key"] = session_store.new_key()
+store = session_store.get_store()
+store.evict_idle()
+
+
+# The model is loaded once per process and shared across sessions and reruns.
+# INFERENCE_BACKEND picks keras, tflite-fp16 or tflite-int8 (see export_tflite.py).
+# Only prediction waits for it, the rest of the page renders right away
+def get_model():
+    if not model_registry.is_loaded(keras_path=output_path):
+        with profiling.stage("model_load"), st.spinner(translate("Loading the model...", dest_lang)):
+            backend = model_registry.get_backend(keras_path=output_path)
+    else:
+        backend = model_registry.get_backend(keras_path=output_path)
+    # Periodic fine-tuning of the classifier on user corrections, started once per process
+    head_tuning.start(backend)
+    return backend
 
-# File ID from your Google Drive share link
-file_id = "1NgqMCMZDmltzmRAXbDFlxyhQMOH4UfTI"
-
-# Output path where model will be saved in Streamlit Cloud
-output_path = "DenseNet201.keras"
-
-# Download only if file doesn't exist (to avoid repeated downloads on rerun)
-if not os.path.exists(output_path):
-    url = f"https://drive.google.com/uc?id={file_id}"
-    gdown.download(url, output_path, quiet=False)
-
-# Now load the model
-from tensorflow.keras.models import load_model
-model = load_model(output_path, compile=False)
-
-# Class Names (Based on your dataset)
-class_names = ['aerosol_cans', 'aluminum_food_cans', 'aluminum_soda_cans', 'cardboard_boxes',
-               'cardboard_packaging', 'clothing', 'coffee_grounds', 'disposable_plastic_cutlery',
-               'eggshells', 'food_waste', 'glass_beverage_bottles', 'glass_cosmetic_containers',
-               'glass_food_jars', 'magazines', 'newspaper', 'office_paper', 'paper_cups',
-               'plastic_cup_lids', 'plastic_detergent_bottles', 'plastic_food_containers',
-               'plastic_shopping_bags', 'plastic_soda_bottles', 'plastic_straws', 'plastic_trash_bags',
-               'plastic_water_bottles', 'shoes', 'steel_food_cans', 'styrofoam_cups',
-               'styrofoam_food_containers', 'tea_bags']
-
-# Waste Categories and Upcycling Ideas
-data = {
-    "Plastic": ["Turn bottles into planters", "Make eco-bricks", "Create DIY organizers"],
-    "Paper and Cardboard": ["Make handmade paper", "Create gift wrapping paper", "Use for composting"],
-    "Glass": ["Turn jars into lanterns", "Make decorative vases", "Use broken glass for mosaic art"],
-    "Metal": ["Make tin can lanterns", "Create wall art from soda cans", "Reuse as storage containers"],
-    "Organic Waste": ["Compost food scraps", "Make DIY plant fertilizer", "Use coffee grounds for skin exfoliation"],
-    "Textiles": ["Turn old shirts into tote bags", "Make patchwork quilts", "Upcycle jeans into shorts"],
-    "Styrofoam": ["Reuse for craft projects", "Insulate fragile items", "Create DIY decorations"]
-}
 
-# Waste Type Mapping
-waste_category_mapping = {
-    "Plastic": ['plastic_cup_lids', 'plastic_detergent_bottles', 'plastic_shopping_bags', 'plastic_straws', 'plastic_water_bottles', 'plastic_food_containers', 'plastic_soda_bottles'],
-    "Paper and Cardboard": ['cardboard_boxes', 'cardboard_packaging', 'magazines', 'newspaper', 'office_paper', 'paper_cups'],
-    "Glass": ['glass_beverage_bottles', 'glass_cosmetic_containers', 'glass_food_jars'],
-    "Metal": ['aerosol_cans', 'aluminum_food_cans', 'aluminum_soda_cans', 'steel_food_cans'],
-    "Organic Waste": ['coffee_grounds', 'eggshells', 'food_waste', 'tea_bags'],
-    "Textiles": ['clothing', 'shoes'],
-    "Styrofoam": ['styrofoam_cups', 'styrofoam_food_containers']
-}
+# The model usually finishes preloading before the first Predict, and cache
+# hits never call get_model(), so start the schedule as soon as it is loaded
+if inference_client is None and model_registry.is_loaded(keras_path=output_path):
+    get_model()
 
-# Category Types
-disposal_methods = {
-    "Plastic": "Recyclable",
-    "Paper and Cardboard": "Recyclable",
-    "Glass": "Recyclable",
-    "Metal": "Recyclable",
-    "Organic Waste": "Disposable",
-    "Textiles": "Upcyclable",
-    "Styrofoam": "Upcyclable"
-}
+# Class names, waste categories, upcycling ideas and levels
+from waste_data import class_names, data, get_level, get_progress
 
-# Database Setup
-def init_db():
-    conn = sqlite3.connect("waste_management.db")
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS waste_data (
-            id INTEGER PRIMARY KEY,
-            waste_type TEXT,
-            description TEXT,
-            upcycling_idea TEXT
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS community_ideas (
-            id INTEGER PRIMARY KEY,
-            user_name TEXT,
-            idea TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
+# Database Setup: one WAL-mode connection per process, tables created on first use
+import db
+db.get_connection()
 
-init_db()
+# Ideas shown per forum page
+FORUM_PAGE_SIZE = 20
+# Neighbours shown under a prediction, and the confidence below which their
+# majority class is offered as a second opinion
+SIMILAR_ITEMS = 4
+LOW_CONFIDENCE = 0.5
 
 # Predict Function
 def preprocess_and_predict(img):
-    img = img.resize((224, 224))
-    img_array = np.array(img) / 255.0
-    img_array = np.expand_dims(img_array, axis=0)
+    return predictor.preprocess_and_predict(get_model(), img)
+
+
+def predict_upload(record):
+    # Re-uploads and repeated "Predict" clicks are answered from the cache
+    cache = prediction_cache.get_cache()
+    image_data = Image.fromarray(record["model_input"]) if cache.perceptual else None
+    with profiling.stage("prediction_cache"):
+        entry = cache.get_by_hash(record["content_hash"], image_data)
+    if entry is None:
+        embedding = None
+        if inference_client is not None:
+            result = inference_client.predict(session_store.model_input_png(record))
+            probs = result.get("probabilities")
+        else:
+            # The stored 224x224 input, the full-size upload is never decoded again
+            result, probs, embedding = predictor.predict_prepared(get_model(), record["model_input"])
+        entry = cache.put_by_hash(record["content_hash"], result, probs, image_data, embedding)
 
-    prediction = model.predict(img_array)
-    predicted_class = class_names[np.argmax(prediction)]
+    # Queued for the analytics rollups, written by a background thread
+    probs = entry["probabilities"]
+    confidence = float(np.max(probs)) if probs is not None else None
+    analytics.log_prediction(entry["predicted_class"], entry["waste_type"], confidence, dest_lang)
+    return entry, confidence
 
-    waste_type = "Unknown"
-    for category, items in waste_category_mapping.items():
-        if predicted_class in items:
-            waste_type = category
-            break
 
-    return predicted_class, waste_type, disposal_methods.get(waste_type, "Unknown")
+def find_similar(embedding):
+    # Needs a built index (embedding_index.py) and a backend that returns embeddings
+    index = embedding_index.get_index()
+    if index is None or embedding is None or len(embedding) != index.vectors.shape[1]:
+        return None
+    with profiling.stage("similarity_search"):
+        return {"neighbours": index.neighbours(embedding, SIMILAR_ITEMS), "vote": index.vote(embedding)}
 
 
 #Streamlit UI
@@ -384,38 +253,79 @@ uploaded_file = st.file_uploader(translate("Choose an image...", dest_lang), typ
 
 
 if uploaded_file is not None:
-    st.session_state.uploaded_file = uploaded_file
-
-    image_data = Image.open(uploaded_file)
-    st.image(image_data, caption=translate("Uploaded Image", dest_lang), use_column_width=True)
+    # Decoded once per upload into a compact record, reruns reuse it
+    upload_id = getattr(uploaded_file, "file_id", None) or prediction_cache.content_hash(uploaded_file.getvalue())
+    record = store.get(st.session_state["session_key"])
+    if record is None or record["upload_id"] != upload_id:
+        with profiling.stage("image_open"):
+            record = session_store.make_record(uploaded_file.getvalue(), upload_id)
+        store.put(st.session_state["session_key"], record)
+    st.image(record["thumbnail"], caption=translate("Uploaded Image", dest_lang), use_column_width=True)
 
     
     # Add Predict button
     if st.button(translate("🔍 Predict", dest_lang)):
-        predicted_class, waste_type, disposal_method = preprocess_and_predict(image_data)
+        entry, confidence = predict_upload(record)
         
-        # Save prediction in session state to retain after rerun
-        st.session_state["predicted_class"] = predicted_class
-        st.session_state["waste_type"] = waste_type
-        st.session_state["disposal_method"] = disposal_method
+        # Save prediction to retain after rerun, arrays go in the session record
+        record["confidence"] = confidence
+        record["embedding"] = entry.get("embedding")
+        record["similar"] = find_similar(record["embedding"])
+        st.session_state["predicted_class"] = entry["predicted_class"]
+        st.session_state["waste_type"] = entry["waste_type"]
+        st.session_state["disposal_method"] = entry["disposal_method"]
+        st.session_state["content_hash"] = entry["content_hash"]
         st.session_state["show_prediction"] = True
         st.session_state["show_location_input"] = False  # Reset
 
 else:
     # Reset all prediction-related state if no file is uploaded
-    st.session_state["uploaded_file"] = None
+    store.drop(st.session_state["session_key"])
     st.session_state["predicted_class"] = None
     st.session_state["waste_type"] = None
     st.session_state["disposal_method"] = None
+    st.session_state["content_hash"] = None
     st.session_state["show_prediction"] = False
     st.session_state["show_location_input"] = False
 
 # Show prediction and interaction menu
 if st.session_state.get("show_prediction", False):
+    # An evicted record only loses the extras: embedding, similar items, confidence
+    record = store.get(st.session_state["session_key"]) or {}
     predicted_class = st.session_state["predicted_class"]
     waste_type = st.session_state["waste_type"]
     disposal_method = st.session_state["disposal_method"]
-    st.success(translate(f"Predicted Waste Type: {predicted_class} ({waste_type}) - {disposal_method}", dest_lang))
+    st.success(f"{translate('Predicted Waste Type', dest_lang)}: {predicted_class} ({translate(waste_type, dest_lang)}) - {translate(disposal_method, dest_lang)}")
+
+    # Corrections are stored with the embedding and used to fine-tune the classifier
+    with st.expander(translate("❓ Wrong? Pick the right class", dest_lang)):
+        corrected_class = st.selectbox(
+            translate("Correct class", dest_lang), class_names, index=class_names.index(predicted_class),
+            key="corrected_class",
+        )
+        if st.button(translate("Submit correction", dest_lang)):
+            if corrected_class == predicted_class:
+                st.warning(translate("That is the predicted class, pick a different one.", dest_lang))
+            else:
+                corrections.add(st.session_state["user_id"], st.session_state.get("content_hash"), predicted_class,
+                                corrected_class, record.get("embedding"))
+                st.success(translate("Thanks! Your correction helps the model improve.", dest_lang))
+
+    similar = record.get("similar")
+    # Empty when every probed cluster was empty, and st.columns(0) raises
+    if similar and similar["neighbours"]:
+        confidence = record.get("confidence")
+        vote_class, vote_share = similar["vote"]
+        if confidence is not None and confidence < LOW_CONFIDENCE and vote_class and vote_class != predicted_class:
+            st.info(f"{translate('Not fully sure. Similar known items are mostly', dest_lang)}: {vote_class} ({vote_share:.0%})")
+        with st.expander(translate("🖼️ Similar reference items", dest_lang)):
+            for column, item in zip(st.columns(len(similar["neighbours"])), similar["neighbours"]):
+                with column:
+                    if item["thumbnail"] is not None:
+                        st.image(item["thumbnail"])
+                    elif os.path.exists(item["path"]):
+                        st.image(item["path"])
+                    st.caption(f"{item['class_name']} ({item['similarity']:.2f})")
 
 
     if disposal_method in ["Recyclable", "Upcyclable"]:
@@ -430,7 +340,7 @@ if st.session_state.get("show_prediction", False):
                     st.write(f"- {translate(idea, dest_lang)}")
                 st.markdown(f"[🔎 Google {translate(disposal_method.lower(), dest_lang)} ideas for {translate(waste_type, dest_lang)}](https://www.google.com/search?q={waste_type}+{disposal_method.lower()}+ideas)")
                 
-                st.session_state["user_points"] += 10
+                award_points(10, disposal_method.lower())
                 st.success(
                     translate(
                         f"🎉 Thank you for choosing to {disposal_method.lower()}! You've earned 10 points.",
@@ -497,9 +407,12 @@ if st.session_state.get("show_prediction", False):
                     "[🔎 Search Disposal Locations Nearby]", f"[🔎 Search Disposal Locations Nearby]({search_url})"
                 )
             )
-            st.session_state["user_points"] += 5
-            st.success(translate("🗑️ Thanks for disposing of your waste responsibly! You've earned 5 points.", dest_lang))
-            play_reward_sound()
+            # The address stays filled in across reruns, award once per prediction
+            if st.session_state.get("disposal_awarded") != st.session_state["content_hash"]:
+                st.session_state["disposal_awarded"] = st.session_state["content_hash"]
+                award_points(5, "disposal")
+                st.success(translate("🗑️ Thanks for disposing of your waste responsibly! You've earned 5 points.", dest_lang))
+                play_reward_sound()
 
             badge_html = """
             <div style="text-align: center; margin-top: 10px;">
@@ -524,42 +437,84 @@ if st.session_state.get("show_prediction", False):
             """
             components.html(badge_html, height=100)
 
-def get_level(points):
-    if points < 50:
-        return "♻️ Eco Rookie"
-    elif points < 100:
-        return "🌱 Green Guardian"
-    elif points < 200:
-        return "🌿 Planet Protector"
-    else:
-        return "🌍 Eco Hero"
-    
-def get_progress(points):
-    if points < 50:
-        return points / 50
-    elif points < 100:
-        return (points - 50) / 50
-    elif points < 200:
-        return (points - 100) / 100
-    else:
-        return 1.0
-
+# Batch classification: many images or a zip archive, classified in vectorized batches
+with st.expander(translate("📦 Batch Classification: Upload Many Images or a Zip", dest_lang)):
+    batch_files = st.file_uploader(
+        translate("Choose images or a zip archive...", dest_lang),
+        type=["jpg", "png", "jpeg", "zip"],
+        accept_multiple_files=True,
+        key="batch_files",
+    )
 
+    if batch_files and st.button(translate("🔍 Classify All", dest_lang)):
+        rows = []
+        progress = st.empty()
+        start = time.perf_counter()
+        if inference_client is not None:
+            stream = classify_stream_remote(inference_client, iter_sources(batch_files))
+        else:
+            stream = classify_stream(get_model(), iter_sources(batch_files))
+        for batch_rows in stream:
+            rows.extend(batch_rows)
+            for row in batch_rows:
+                if row["predicted_class"] is not None:
+                    analytics.log_prediction(row["predicted_class"], row["waste_type"], row["confidence"], dest_lang)
+            progress.write(f"{translate('Images classified', dest_lang)}: {len(rows)}")
+        elapsed = time.perf_counter() - start
+
+        classified = sum(1 for row in rows if row["predicted_class"] is not None)
+        st.dataframe(pd.DataFrame(rows), use_container_width=True)
+        st.info(f"{translate('Throughput', dest_lang)}: {classified / max(elapsed, 1e-9):.1f} images/s ({classified} / {elapsed:.2f}s)")
 
 # Sidebar for User Profile
 st.sidebar.title(translate("User Profile", dest_lang))
 st.sidebar.write(translate("Manage your profile and view your points.", dest_lang))
 
-user_points = st.session_state.get("user_points", 0)
+# Running total from user_totals: a primary key lookup, not a sum over the ledger
+user_points = accounts.get_points(st.session_state["user_id"])
+st.session_state["user_points"] = user_points
 user_level = get_level(user_points)
 st.sidebar.progress(get_progress(user_points))
 st.sidebar.write(translate(f"👤 User Level: {user_level}", dest_lang))
 
-st.sidebar.write(translate(f"💰 Points: {user_points}", dest_lang))
+st.sidebar.write(f"{translate('💰 Points', dest_lang)}: {user_points}")
+
+# ---- Leaderboard ----
+st.sidebar.subheader(translate("🏆 Leaderboard", dest_lang))
+for rank, (name, points) in enumerate(accounts.leaderboard(5), start=1):
+    st.sidebar.write(f"{rank}. {name}: {points}")
+
+# ---- Profiling panel (admins only) ----
+if profiling.ENABLED and st.session_state.user_name.lower() in ADMIN_USERS and not st.session_state.get("is_admin"):
+    password = admin_password()
+    attempt = st.sidebar.text_input("🔑 Admin password", type="password", key="admin_password")
+    if password and attempt and hmac.compare_digest(attempt.encode(), password.encode()):
+        st.session_state["is_admin"] = True
+        st.rerun()
+    elif attempt:
+        st.sidebar.error("Wrong password" if password else "No ADMIN_PASSWORD configured, the panel is disabled")
+
+if profiling.ENABLED and st.session_state.get("is_admin"):
+    with st.sidebar.expander("⏱️ Profiling (recent reruns)"):
+        stages = profiling.summary()
+        if stages:
+            table = pd.DataFrame(stages).T
+            table[["mean", "p50", "p95"]] *= 1000
+            st.dataframe(table.rename(columns={"mean": "mean ms", "p50": "p50 ms", "p95": "p95 ms"}).round(2))
+        if inference_client is None and model_registry.is_loaded(keras_path=output_path):
+            backend = get_model()
+            if hasattr(backend, "stats"):
+                # Worker pool queue depth and utilization, cascade hit rates
+                st.json(backend.stats())
+        # Per-session records of uploads, evicted when idle
+        st.json(store.stats())
+        st.download_button("metrics.prom", profiling.export_prometheus(), file_name="metrics.prom")
+        st.download_button("metrics.json", profiling.export_json(), file_name="metrics.json")
 
 # ---- Logout Button ----
 st.sidebar.markdown("---")
 if st.sidebar.button("🚪 Logout"):
+    store.drop(st.session_state["session_key"])
     for key in list(st.session_state.keys()):
         del st.session_state[key]
     st.sidebar.success("You have been logged out. Please refresh the page.")
@@ -574,16 +529,11 @@ with st.expander(translate("🌍 Community Forum: Share Your Upcycling Ideas", d
 
     if st.button("Submit Idea"):
          if user_name and user_idea:
-            conn = sqlite3.connect("waste_management.db")
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO community_ideas (user_name, idea) VALUES (?, ?)", (user_name, user_idea))
-            conn.commit()
-            conn.close()
+            db.add_idea(user_name, user_idea)
+            # Back to the first page so the new idea shows up
+            st.session_state["forum_cursors"] = [None]
 
-            # ✅ Safely update points
-            if "user_points" not in st.session_state:
-                st.session_state["user_points"] = 0
-            st.session_state["user_points"] += 20
+            award_points(20, "community_idea")
 
             st.success(translate("🎉 Idea submitted successfully! You've earned 20 points.", dest_lang))
             play_reward_sound()
@@ -616,13 +566,37 @@ with st.expander(translate("🌍 Community Forum: Share Your Upcycling Ideas", d
     else:
         st.warning(translate("Please enter both your name and an idea to submit.", dest_lang))       
 
-    conn = sqlite3.connect("waste_management.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT user_name, idea FROM community_ideas")
-    ideas = cursor.fetchall()
-    conn.close()
+    search = st.text_input(translate("🔎 Search ideas", dest_lang), key="forum_search")
 
-    for name, idea in ideas:
-        st.write(f"**{name}**: {translate(idea, dest_lang)}")
+    if search.strip():
+        with profiling.stage("forum_query"):
+            ideas = db.search_ideas(search, limit=FORUM_PAGE_SIZE)
+    else:
+        # Keyset pagination: a stack of page cursors, newest page first
+        if "forum_cursors" not in st.session_state:
+            st.session_state["forum_cursors"] = [None]
+        cursors = st.session_state["forum_cursors"]
+
+        newer_col, older_col = st.columns(2)
+        with newer_col:
+            if len(cursors) > 1 and st.button(translate("⬅️ Newer ideas", dest_lang)):
+                cursors.pop()
+        with older_col:
+            if st.session_state.get("forum_next") and st.button(translate("Older ideas ➡️", dest_lang)):
+                cursors.append(st.session_state["forum_next"])
+
+        with profiling.stage("forum_query"):
+            ideas, st.session_state["forum_next"] = db.recent_ideas(FORUM_PAGE_SIZE, before=cursors[-1])
+
+    # One batched translation call for the page instead of one per row
+    translated_ideas = translate_many([idea for _, _, idea, _ in ideas], dest_lang)
+    for (_, name, _, _), idea in zip(ideas, translated_ideas):
+        st.write(f"**{name}**: {idea}")
+
+# Translate this rerun's cache misses in one call, ready for the next rerun
+flush_pending()
+
+if profiling.ENABLED:
+    profiling.record("rerun", time.perf_counter() - rerun_start)
 
 
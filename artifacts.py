@@ -0,0 +1,145 @@
+"""Model files resolved from disk or a local cache and checked against artifacts.json.
+
+    python artifacts.py pin DenseNet201.keras      # record sha256/size in the manifest
+    python artifacts.py verify                     # check every artifact that is present
+
+resolve() never touches the network for a file that is already on disk. A
+missing file is downloaded from the manifest URL into SWM_ARTIFACT_CACHE
+(default ~/.cache/smart-waste), verified, then moved into place. An artifact
+without a pinned sha256 is neither downloaded nor loaded: pin it from a
+trusted copy first. Until then, setting SWM_ALLOW_UNPINNED=1 lets an unpinned
+file that is already on disk load unverified; it is still never downloaded.
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+
+MANIFEST = os.environ.get("SWM_ARTIFACTS", "artifacts.json")
+CACHE_DIR = os.environ.get("SWM_ARTIFACT_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "smart-waste"))
+ALLOW_UNPINNED = os.environ.get("SWM_ALLOW_UNPINNED") == "1"
+
+_lock = threading.Lock()
+# Paths already verified by this process, so reruns don't re-hash
+_verified = {}
+
+
+def load_manifest(path=MANIFEST):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def sha256sum(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _unpinned(name):
+    """An unpinned artifact already on disk, if SWM_ALLOW_UNPINNED opts in to loading it unverified."""
+    cached = os.path.join(CACHE_DIR, os.path.basename(name))
+    if ALLOW_UNPINNED:
+        for path in (name, cached):
+            if os.path.exists(path):
+                print(f"Loading unpinned {path} without verification (SWM_ALLOW_UNPINNED=1)")
+                return path
+        raise RuntimeError(f"No sha256 pinned for {name} in {MANIFEST}, refusing to download it unverified")
+    raise RuntimeError(
+        f"No sha256 pinned for {name} in {MANIFEST}, refusing to download or load it. "
+        f"Get a trusted copy and run `python artifacts.py pin {name}`, "
+        f"or set SWM_ALLOW_UNPINNED=1 to load a local copy unverified"
+    )
+
+
+def _verify(name, path, expected):
+    actual = sha256sum(path)
+    if actual != expected:
+        print(f"Checksum mismatch for {path}: expected {expected}, got {actual}")
+        return False
+    return True
+
+
+def _download(name, entry, dest, expected):
+    import gdown
+
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp = dest + ".part"
+    print(f"Downloading {name} to {dest}")
+    gdown.download(entry["url"], tmp, quiet=True)
+    actual = sha256sum(tmp)
+    if actual != expected:
+        os.remove(tmp)
+        raise RuntimeError(f"Downloaded {name} has sha256 {actual}, expected {expected}")
+    os.replace(tmp, dest)
+    return dest
+
+
+def resolve(name, manifest=None):
+    """Local path for artifact `name`: the file itself, the cached copy, or a fresh download."""
+    if name in _verified:
+        return _verified[name]
+    manifest = load_manifest() if manifest is None else manifest
+    entry = manifest.get(name)
+    if entry is None:
+        # Not a managed artifact (e.g. a model from saved_models/), use as is
+        return name
+
+    expected = entry.get("sha256")
+    with _lock:
+        if name in _verified:
+            return _verified[name]
+        if not expected:
+            _verified[name] = _unpinned(name)
+            return _verified[name]
+        cached = os.path.join(CACHE_DIR, os.path.basename(name))
+        for path in (name, cached):
+            if os.path.exists(path) and _verify(name, path, expected):
+                _verified[name] = path
+                return path
+        if not entry.get("url"):
+            raise FileNotFoundError(f"No verified copy of {name} locally or in {CACHE_DIR}, and no download URL")
+        _verified[name] = _download(name, entry, cached, expected)
+        return _verified[name]
+
+
+def pin(path, url=None, manifest_path=MANIFEST):
+    manifest = load_manifest(manifest_path)
+    entry = manifest.setdefault(path, {})
+    entry["sha256"] = sha256sum(path)
+    entry["size"] = os.path.getsize(path)
+    if url:
+        entry["url"] = url
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    print(f"Pinned {path}: {entry['sha256']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    pin_parser = sub.add_parser("pin")
+    pin_parser.add_argument("path")
+    pin_parser.add_argument("--url")
+    sub.add_parser("verify")
+    args = parser.parse_args()
+
+    if args.command == "pin":
+        pin(args.path, args.url)
+    else:
+        for name, entry in load_manifest().items():
+            cached = os.path.join(CACHE_DIR, os.path.basename(name))
+            path = name if os.path.exists(name) else cached if os.path.exists(cached) else None
+            if not entry.get("sha256"):
+                allowed = ALLOW_UNPINNED and path is not None
+                print(f"{name}: NOT PINNED, {'loaded unverified' if allowed else 'will not be loaded'}")
+            elif path is None:
+                print(f"{name}: missing")
+            else:
+                ok = _verify(name, path, entry["sha256"])
+                print(f"{name}: {'ok' if ok else 'CHECKSUM MISMATCH'} ({path})")
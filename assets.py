@@ -0,0 +1,195 @@
+import base64
+import functools
+import hashlib
+import os
+
+STATIC_DIR = "static"
+BACKGROUND = "background.avif"
+# Smaller copies written by make_bg_variants.py, used on narrower screens
+VARIANT_WIDTHS = (960, 1440)
+
+
+def variant_name(width):
+    return f"background-{width}.webp"
+
+
+@functools.lru_cache(maxsize=None)
+def _version(name):
+    # Content hash in the URL: browsers can keep the file until it changes
+    with open(os.path.join(STATIC_DIR, name), "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def static_url(name):
+    return f"app/static/{name}?v={_version(name)}"
+
+
+@functools.lru_cache(maxsize=None)
+def background_base64():
+    with open(os.path.join(STATIC_DIR, BACKGROUND), "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+
+@functools.lru_cache(maxsize=None)
+def background_css(static_serving):
+    rule = """
+[data-testid="stAppViewContainer"] {{
+    background-image: url("{url}");
+    background-size: cover;
+    background-position: center;
+    background-repeat: no-repeat;
+    background-attachment: fixed;
+}}"""
+    if not static_serving:
+        # Static serving disabled: inline the image, but encode it only once per process
+        return "/* Background image */" + rule.format(url=f"data:image/avif;base64,{background_base64()}")
+
+    css = "/* Background image */" + rule.format(url=static_url(BACKGROUND))
+    for width in sorted(VARIANT_WIDTHS, reverse=True):
+        if os.path.exists(os.path.join(STATIC_DIR, variant_name(width))):
+            css += f"\n@media (max-width: {width}px) {{" + rule.format(url=static_url(variant_name(width))) + "\n}"
+    return css
+
+
+@functools.lru_cache(maxsize=None)
+def page_css(dark_mode, static_serving=True):
+    """The page <style> block, built once per process for each dark_mode value."""
+    return f"""
+<style>
+{background_css(static_serving)}
+
+
+
+/* Main card blur and transparency */
+[data-testid="stAppViewContainer"] > .main {{
+    backdrop-filter: blur(6px);
+    background-color: {'rgba(25, 25, 25, 0.5)' if dark_mode else 'rgba(255, 255, 255, 0.65)'};
+    border-radius: 20px;
+    padding: 2rem;
+    margin: 2rem;
+    color: {'#fff' if dark_mode else '#000'};
+}}
+
+
+
+/* Custom scrollbar */
+[data-testid="stAppViewContainer"]::-webkit-scrollbar {{
+    width: 8px;
+}}
+ /* Custom sidebar toggle */
+[data-testid="stSidebar"] {{
+    background-color: {'rgba(0, 0, 0, 0.5)' if dark_mode else 'rgba(255, 255, 255, 0.8)'};
+    backdrop-filter: blur(6px);
+    color: {'#fff' if dark_mode else '#000'};
+}}
+/* Headings */
+h1, h2, h3 {{
+    color: {'#90ee90' if dark_mode else '#2E8B57'};
+    text-shadow: 1px 1px 3px #00000040;
+}}
+
+/* Sidebar */
+section[data-testid="stSidebar"] {{
+    background: linear-gradient(135deg, #E0F7FA 0%, #FFF9C4 100%);
+    color: black;
+    border-right: 2px solid #ddd;
+}}
+
+section[data-testid="stSidebar"] h1, 
+section[data-testid="stSidebar"] h2, 
+section[data-testid="stSidebar"] h3 {{
+    color: black;
+}}
+
+/* Form labels */
+label, .stTextInput label {{
+    color: {'white' if dark_mode else 'black'} !important;
+    text-shadow: 1px 1px 2px rgba(0,0,0,0.2);
+    font-weight: 500;
+    font-size: 16px;
+}}
+
+/* --- Prediction Box --- */
+.prediction-box {{
+    background: linear-gradient(135deg, #e0f7fa, #ffffff);
+    color: #004d40;
+    border: 2px solid #26a69a;
+    padding: 15px;
+    border-radius: 12px;
+    font-weight: bold;
+    text-align: center;
+    margin-top: 20px;
+    box-shadow: 0 4px 12px rgba(0, 150, 136, 0.2);
+    transition: all 0.3s ease-in-out;
+}}
+
+.prediction-box:hover {{
+    box-shadow: 0 0 20px 4px rgba(0, 150, 136, 0.3);
+    transform: scale(1.02);
+}}
+
+.dark .prediction-box {{
+    background: #263238;
+    color: #80cbc4;
+    border: 2px solid #4db6ac;
+    box-shadow: 0 0 20px 2px rgba(38, 166, 154, 0.3);
+}}
+
+/* --- Community Forum Box --- */
+.community-box {{
+    background: linear-gradient(145deg, #f1f8e9, #ffffff);
+    border: 2px solid #aed581;
+    border-radius: 16px;
+    padding: 20px;
+    margin-top: 25px;
+    box-shadow: 0 4px 12px rgba(139, 195, 74, 0.25);
+    transition: all 0.3s ease-in-out;
+}}
+
+.community-box:hover {{
+    transform: scale(1.01);
+    box-shadow: 0 6px 18px rgba(139, 195, 74, 0.3);
+}}
+
+.dark .community-box {{
+    background: #1c2e1b;
+    border: 2px solid #9ccc65;
+    box-shadow: 0 6px 20px rgba(139, 195, 74, 0.4);
+    color: #dcedc8;
+}}
+
+/* --- Warning Message --- */
+.warning-msg {{
+    color: #b00020;
+    font-size: 15px;
+    font-weight: 600;
+    margin-top: 10px;
+    text-align: center;
+    background-color: rgba(255, 235, 238, 0.8);
+    border: 1px solid #ffcdd2;
+    border-radius: 8px;
+    padding: 8px 12px;
+}}
+
+.dark .warning-msg {{
+    color: #ff8a80;
+    background-color: rgba(75, 0, 0, 0.7);
+    border: 1px solid #ff5252;
+}}
+
+
+/* --- Buttons --- */
+.stButton > button {{
+    background-color: {'#90ee90' if dark_mode else '#2E8B57'};
+    color: {'black' if dark_mode else 'white'};
+    font-weight: bold;
+    border-radius: 10px;
+    padding: 10px 20px;
+    transition: background-color 0.3s ease;
+}}
+
+.stButton > button:hover {{
+    background-color: {'#77dd77' if dark_mode else '#3CB371'};
+}}
+</style>
+"""
@@ -0,0 +1,104 @@
+import io
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from cascade import CascadeBackend
+from predictor import describe
+from preprocessing import IMAGE_SIZE, load, to_model_input
+
+BATCH_SIZE = 32
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+DECODE_WORKERS = min(8, (os.cpu_count() or 1) + 4)
+
+
+def iter_sources(uploaded_files):
+    """(name, bytes) for every image in the uploads, zip archives expanded."""
+    for uploaded in uploaded_files:
+        name = uploaded.name
+        if name.lower().endswith(".zip"):
+            with zipfile.ZipFile(uploaded) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                        yield info.filename, archive.read(info)
+        elif name.lower().endswith(IMAGE_EXTENSIONS):
+            yield name, uploaded.getvalue()
+
+
+def load_image(source):
+    """(name, HxWx3 uint8 array or None) for a (name, bytes or file path) source."""
+    name, raw = source
+    try:
+        # A path is read here, in the decode thread, so file I/O overlaps too
+        return name, np.asarray(load(raw if isinstance(raw, str) else io.BytesIO(raw)), dtype=np.uint8)
+    except Exception:
+        # Corrupt or unsupported file, reported in the results instead of failing the batch
+        return name, None
+
+
+def iter_decoded(sources, workers=DECODE_WORKERS, max_pending=BATCH_SIZE * 2):
+    """Decode and resize in a thread pool, keeping at most `max_pending` in flight."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for source in sources:
+            pending.append(pool.submit(load_image, source))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def new_batch(batch_size=BATCH_SIZE):
+    return np.zeros((batch_size,) + IMAGE_SIZE[::-1] + (3,), dtype=np.float32)
+
+
+def predict_batch(model, names, arrays, batch):
+    # The batch buffer is reused and always has the same shape, so the model
+    # doesn't retrace on the last, shorter batch (stale rows are ignored)
+    for i, array in enumerate(arrays):
+        to_model_input(array, out=batch[i])
+    if isinstance(model, CascadeBackend):
+        # Padding rows must not be escalated to the second stage or counted
+        probs = model.predict(batch, rows=len(arrays))
+    else:
+        probs = model.predict(batch)[:len(arrays)]
+
+    return [dict(file=name, **describe(p)) for name, p in zip(names, probs)]
+
+
+def classify_stream(model, sources, batch_size=BATCH_SIZE, workers=DECODE_WORKERS):
+    """Yield result rows one batch at a time, so the caller can show progress."""
+    batch = new_batch(batch_size)
+    names, arrays, failed = [], [], []
+    for name, array in iter_decoded(sources, workers, max_pending=batch_size * 2):
+        if array is None:
+            failed.append({"file": name, "predicted_class": None, "waste_type": "Unreadable",
+                           "disposal_method": None, "confidence": None})
+            continue
+        names.append(name)
+        arrays.append(array)
+        if len(arrays) == batch_size:
+            yield predict_batch(model, names, arrays, batch) + failed
+            names, arrays, failed = [], [], []
+    if arrays or failed:
+        yield (predict_batch(model, names, arrays, batch) if arrays else []) + failed
+
+
+def classify_stream_remote(client, sources, batch_size=BATCH_SIZE):
+    """Same as classify_stream, but decoding and inference happen in inference_service.py."""
+    def rows(names, images):
+        results = client.predict_batch(images)
+        return [{"file": n, **{k: v for k, v in r.items() if k != "probabilities"}} for n, r in zip(names, results)]
+
+    names, images = [], []
+    for name, raw in sources:
+        names.append(name)
+        images.append(raw)
+        if len(images) == batch_size:
+            yield rows(names, images)
+            names, images = [], []
+    if images:
+        yield rows(names, images)
@@ -0,0 +1,74 @@
+import atexit
+import queue
+import threading
+import time
+
+
+class BatchWriter:
+    """Background thread that hands queued items to `write()` in batches.
+
+    `put()` never blocks on I/O: items are written every `flush_interval`
+    seconds, or as soon as `flush_size` of them are waiting. Subclasses
+    implement `write(items)`, typically one SQLite transaction per batch,
+    and can override `failed(items)` to undo bookkeeping for a dropped batch.
+    """
+
+    def __init__(self, name, flush_interval=0.5, flush_size=200):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.items_written = 0
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def put(self, item):
+        self.queue.put(item)
+
+    def write(self, items):
+        raise NotImplementedError
+
+    def failed(self, items):
+        """Called with a batch whose write() raised, the items are dropped."""
+
+    def _write(self, items):
+        with self._write_lock:
+            self.write(items)
+            self.batches += 1
+            self.items_written += len(items)
+
+    def _run(self):
+        while True:
+            items = [self.queue.get()]
+            deadline = time.time() + self.flush_interval
+            while len(items) < self.flush_size:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self._write(items)
+            except Exception as e:
+                # Keep the thread alive, a failed batch must not stop later ones
+                print(f"{self._thread.name}: failed to write {len(items)} items: {e}")
+                self.failed(items)
+
+    def flush(self):
+        """Write everything queued right now, in the calling thread."""
+        items = []
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if items:
+            try:
+                self._write(items)
+            except Exception:
+                self.failed(items)
+                raise
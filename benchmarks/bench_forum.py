@@ -0,0 +1,81 @@
+"""Community forum render cost as community_ideas grows.
+
+    python -m benchmarks.bench_forum
+    python -m benchmarks.bench_forum --sizes 10000 100000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import db
+import translation
+from benchmarks.common import timings_ms, write_results
+
+SIZES = [10_000, 100_000, 1_000_000]
+WORDS = ["bottle", "jar", "planter", "lamp", "tote", "bag", "compost", "mosaic", "shelf", "organizer",
+         "cardboard", "denim", "can", "lantern", "quilt", "vase", "bricks", "fertilizer", "wall", "art"]
+PAGE_SIZE = 20
+
+
+def use_database(path):
+    db.DB_PATH = path
+    db._conn = None
+    translation._cache = None
+    db.get_connection()
+
+
+def populate(n):
+    rng = random.Random(0)
+    now = time.time()
+    conn = db.get_connection()
+    with db.lock:
+        for start in range(0, n, 50_000):
+            rows = [
+                (f"user{i % 500}", " ".join(rng.choices(WORDS, k=8)), now - (n - i))
+                for i in range(start, min(n, start + 50_000))
+            ]
+            conn.executemany("INSERT INTO community_ideas (user_name, idea, created_at) VALUES (?, ?, ?)", rows)
+        conn.commit()
+
+
+def render_page(before=None):
+    # What the forum does per rerun: one page, translated in one batched call
+    ideas, cursor = db.recent_ideas(PAGE_SIZE, before=before)
+    translation.translate_many([idea for _, _, idea, _ in ideas], "hi")
+    return cursor
+
+
+def bench_size(n, repeat):
+    populate(n)
+    cursor = None
+    for _ in range(50):
+        cursor = render_page(cursor)
+
+    return {
+        # The query the forum ran before pagination, for reference
+        "full_scan": timings_ms(lambda: db.query("SELECT user_name, idea FROM community_ideas"), max(3, repeat // 10)),
+        "first_page": timings_ms(lambda: db.recent_ideas(PAGE_SIZE), repeat),
+        "page_50": timings_ms(lambda: db.recent_ideas(PAGE_SIZE, before=cursor), repeat),
+        "render_first_page": timings_ms(render_page, repeat),
+        "search": timings_ms(lambda: db.search_ideas("lantern quilt", PAGE_SIZE), repeat),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    # Stub translator: measure the data path, not the network
+    os.environ["TRANSLATOR_BACKEND"] = "stub"
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            use_database(os.path.join(tmp, f"forum_{n}.db"))
+            results[f"{n}_ideas"] = bench_size(n, args.repeat)
+            print(f"{n:>9} ideas: first page {results[f'{n}_ideas']['render_first_page']['p50_ms']:.2f} ms, "
+                  f"full scan {results[f'{n}_ideas']['full_scan']['p50_ms']:.1f} ms")
+    write_results("forum", results)
@@ -0,0 +1,64 @@
+"""Training input throughput: ImageDataGenerator (smart.ipynb) vs the tf.data pipeline.
+
+    python -m benchmarks.bench_input_pipeline --batches 50
+
+Both read the same training split with augmentation on. The tf.data numbers
+are given for the first (decoding) epoch and for a cached epoch.
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.common import write_results
+from training.dataset import BATCH_SIZE, DATASET_DIR, IMG_SIZE, build_img_dataset
+
+
+def images_per_second(iterator, batches):
+    next(iterator)  # worker start-up and first-batch latency are not throughput
+    start = time.perf_counter()
+    count = 0
+    for _ in range(batches):
+        images, _ = next(iterator)
+        count += len(images)
+    return count / (time.perf_counter() - start)
+
+
+def image_data_generator(paths, labels, class_names):
+    # create_datagen(augment=True) from the notebook
+    import pandas as pd
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+    datagen = ImageDataGenerator(rescale=1.0 / 255, rotation_range=20, horizontal_flip=True,
+                                 brightness_range=[0.8, 1.2])
+    frame = pd.DataFrame({"filename": paths, "label": [class_names[label] for label in labels]})
+    return datagen.flow_from_dataframe(frame, x_col="filename", y_col="label", target_size=IMG_SIZE,
+                                       batch_size=BATCH_SIZE, class_mode="categorical")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", default=DATASET_DIR)
+    parser.add_argument("--batches", type=int, default=50)
+    args = parser.parse_args()
+
+    from training import pipeline
+
+    X_train, y_train, _, _, _, _, class_names = build_img_dataset(args.dataset)
+    # Enough files for the measured batches, so the tf.data cache fills in one pass
+    n = min(len(X_train), (args.batches + 1) * BATCH_SIZE)
+    paths, labels = X_train[:n], y_train[:n]
+
+    results = {"images": n, "generator": images_per_second(image_data_generator(paths, labels, class_names), args.batches)}
+    with tempfile.TemporaryDirectory() as tmp:
+        ds = pipeline.make_dataset(paths, labels, len(class_names), training=True, cache_dir=tmp)
+        first_epoch = iter(ds)
+        results["tf_data_first_epoch"] = images_per_second(first_epoch, args.batches)
+        # The cache file is only finalized once the epoch runs to the end
+        for _ in first_epoch:
+            pass
+        results["tf_data_cached"] = images_per_second(iter(ds.repeat()), args.batches)
+    results["speedup_cached"] = results["tf_data_cached"] / results["generator"]
+
+    for name in ("generator", "tf_data_first_epoch", "tf_data_cached"):
+        print(f"{name:<20} {results[name]:>8.1f} images/s")
+    write_results("input_pipeline", results)
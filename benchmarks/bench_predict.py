@@ -0,0 +1,81 @@
+"""Classification latency: single images, batches, cold vs warm model.
+
+    python -m benchmarks.bench_predict
+    INFERENCE_BACKEND=tflite-int8 python -m benchmarks.bench_predict --repeat 50
+"""
+import argparse
+import io
+import time
+
+import numpy as np
+from PIL import Image
+
+import inference_backends
+import model_registry
+import predictor
+from batch_predict import classify_stream
+from benchmarks.common import RESOLUTIONS, synthetic_jpeg, timings_ms, write_results
+
+BATCH_SIZES = [1, 8, 32]
+
+
+def bench_model_load(backend):
+    # Cold: deserialize and first forward pass, what every rerun paid before
+    # the model registry
+    start = time.perf_counter()
+    model = inference_backends.load_backend(backend)
+    load_ms = (time.perf_counter() - start) * 1000
+    x = np.zeros((1, 224, 224, 3), dtype=np.float32)
+    start = time.perf_counter()
+    model.predict(x)
+    first_predict_ms = (time.perf_counter() - start) * 1000
+
+    # Warm: the registry hands back the instance that is already loaded
+    model_registry.get_backend(backend)
+    warm = timings_ms(lambda: model_registry.get_backend(backend), repeat=1000)
+    return {
+        "cold_load_ms": load_ms,
+        "cold_first_predict_ms": first_predict_ms,
+        "warm_get_backend": warm,
+        "warm_predict": timings_ms(lambda: model.predict(x), repeat=20),
+    }
+
+
+def bench_single(model, repeat):
+    results = {}
+    for width, height in RESOLUTIONS:
+        raw = synthetic_jpeg((width, height))
+        results[f"{width}x{height}"] = {
+            "decode_preprocess": timings_ms(lambda: predictor.preprocess(Image.open(io.BytesIO(raw))), repeat),
+            "preprocess_and_predict": timings_ms(
+                lambda: predictor.preprocess_and_predict(model, Image.open(io.BytesIO(raw))), repeat
+            ),
+        }
+    return results
+
+
+def bench_batches(model, repeat):
+    results = {}
+    for width, height in RESOLUTIONS:
+        raw = synthetic_jpeg((width, height))
+        for batch_size in BATCH_SIZES:
+            sources = [("bench.jpg", raw)] * batch_size
+            # Decode, resize and predict, as the batch uploader does, so the
+            # upload resolution shows up in the timings
+            stats = timings_ms(lambda: list(classify_stream(model, sources, batch_size)), repeat)
+            stats["images_per_second"] = 1000 * batch_size / stats["mean_ms"]
+            results[f"{width}x{height}/batch_{batch_size}"] = stats
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default=inference_backends.BACKEND)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    results = {"backend": args.backend, "model_load": bench_model_load(args.backend)}
+    model = model_registry.get_backend(args.backend)
+    results["single"] = bench_single(model, args.repeat)
+    results["batches"] = bench_batches(model, args.repeat)
+    write_results("predict", results)
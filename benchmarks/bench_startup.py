@@ -0,0 +1,75 @@
+"""Cold start: module import cost and time from `streamlit run` to an interactive login.
+
+    python -m benchmarks.bench_startup --repeat 5
+
+First paint needs playwright (see load_test.py). The server also logs its own
+number ("Cold start: first page rendered ...") via profiling.mark_first_paint().
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+
+from benchmarks.common import summarize, write_results
+from benchmarks.load_test import free_port, start_server
+
+# What app.py imports before the login view renders
+APP_IMPORTS = "import streamlit, accounts, analytics, assets, model_registry, predictor, prediction_cache, profiling, translation"
+
+
+def import_seconds():
+    # Fresh interpreter each time, the number a cold process pays
+    out = subprocess.run(
+        [sys.executable, "-c", f"import time; t = time.perf_counter(); {APP_IMPORTS}; print(time.perf_counter() - t)"],
+        check=True, capture_output=True, text=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def tensorflow_imported():
+    out = subprocess.run(
+        [sys.executable, "-c", f"import sys; {APP_IMPORTS}; print('tensorflow' in sys.modules)"],
+        check=True, capture_output=True, text=True,
+    )
+    return out.stdout.strip().splitlines()[-1] == "True"
+
+
+async def first_paint_seconds():
+    from playwright.async_api import async_playwright
+
+    port = free_port()
+    start = time.perf_counter()
+    server = start_server(port)
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch()
+            page = await browser.new_page()
+            await page.goto(f"http://127.0.0.1:{port}")
+            await page.get_by_label("Enter your name:").wait_for(timeout=120_000)
+            elapsed = time.perf_counter() - start
+            await browser.close()
+    finally:
+        server.terminate()
+        server.wait()
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-browser", action="store_true", help="only measure imports")
+    args = parser.parse_args()
+
+    results = {
+        "tensorflow_imported_before_login": tensorflow_imported(),
+        "imports": summarize([import_seconds() * 1000 for _ in range(args.repeat)]),
+    }
+    if not args.skip_browser:
+        results["first_paint"] = summarize([asyncio.run(first_paint_seconds()) * 1000 for _ in range(args.repeat)])
+
+    for name in ("imports", "first_paint"):
+        if name in results:
+            print(f"{name:<12} p50 {results[name]['p50_ms']:>9.1f} ms  p95 {results[name]['p95_ms']:>9.1f} ms")
+    print(f"tensorflow imported before login: {results['tensorflow_imported_before_login']}")
+    write_results("startup", results)
@@ -0,0 +1,96 @@
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+from PIL import Image
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Typical upload sizes: webcam, full HD screenshot, 12 MP phone photo
+RESOLUTIONS = [(640, 480), (1920, 1080), (4032, 3024)]
+
+
+def synthetic_jpeg(size, seed=0):
+    """A noisy JPEG, so decode cost is realistic (flat images compress to nothing)."""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (size[1] // 8, size[0] // 8, 3), dtype=np.uint8)
+    img = Image.fromarray(small).resize(size, Image.BILINEAR)
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def timings_ms(fn, repeat, warmup=1):
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings)
+
+
+def summarize(timings):
+    return {
+        "n": len(timings),
+        "mean_ms": float(np.mean(timings)),
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "min_ms": float(np.min(timings)),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_results(name, results):
+    """Save to benchmarks/results/<name>-<timestamp>.json and return the path."""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump({"benchmark": name, "environment": environment(), "results": results}, f, indent=2)
+    print(f"Wrote {path}")
+    return path
+
+
+def compare(old_path, new_path, key="p50_ms"):
+    """Print the relative change of `key` for every entry two result files share."""
+    with open(old_path) as f:
+        old = json.load(f)["results"]
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+
+    def flatten(d, prefix=""):
+        for k, v in d.items():
+            if isinstance(v, dict) and key in v:
+                yield prefix + k, v[key]
+            elif isinstance(v, dict):
+                yield from flatten(v, f"{prefix}{k}/")
+
+    old_flat = dict(flatten(old))
+    for name, value in flatten(new):
+        if name in old_flat and old_flat[name]:
+            change = (value - old_flat[name]) / old_flat[name]
+            print(f"{name:<50} {old_flat[name]:>10.2f} -> {value:>10.2f} {change:>+8.1%}")
+
+
+if __name__ == "__main__":
+    import sys
+    # python -m benchmarks.common old.json new.json
+    compare(sys.argv[1], sys.argv[2])
@@ -0,0 +1,136 @@
+"""Headless load generator: N concurrent Streamlit sessions against a local instance.
+
+    pip install playwright && playwright install chromium
+    python -m benchmarks.load_test --sessions 10 --rounds 3
+
+Starts `streamlit run app.py` with the stub translator (or uses --url), then
+every simulated session logs in and repeats upload -> Predict -> Yes/No,
+timing each step until the expected text shows up.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import RESOLUTIONS, summarize, synthetic_jpeg, write_results
+
+STEP_TIMEOUT_MS = 120_000
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port):
+    env = dict(os.environ, TRANSLATOR_BACKEND="stub")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "app.py", "--server.headless=true",
+         f"--server.port={port}", "--browser.gatherUsageStats=false"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.5)
+    server.kill()
+    raise RuntimeError("streamlit did not start within 60s")
+
+
+async def timed(timings, step, coro):
+    start = time.perf_counter()
+    await coro
+    timings.setdefault(step, []).append((time.perf_counter() - start) * 1000)
+
+
+async def session(browser, url, index, images, rounds, timings, errors):
+    context = await browser.new_context()
+    page = await context.new_page()
+    rng = random.Random(index)
+    try:
+        await timed(timings, "first_paint", page.goto(url, wait_until="networkidle"))
+        await page.get_by_label("Enter your name:").fill(f"Load Tester {index}")
+        await page.get_by_role("button", name="Login").click()
+        await timed(timings, "login", page.get_by_text("Welcome,").wait_for(timeout=STEP_TIMEOUT_MS))
+
+        for _ in range(rounds):
+            await page.locator("input[type=file]").first.set_input_files(rng.choice(images))
+            await timed(timings, "upload", page.get_by_role("button", name="🔍 Predict").wait_for(timeout=STEP_TIMEOUT_MS))
+            await page.get_by_role("button", name="🔍 Predict").click()
+            await timed(timings, "predict",
+                        page.get_by_text("Predicted Waste Type").wait_for(timeout=STEP_TIMEOUT_MS))
+
+            answer = rng.choice(["Yes", "No"])
+            button = page.get_by_role("button", name=answer, exact=True)
+            if await button.count():
+                await button.click()
+                expected = "points" if answer == "Yes" else "Enter your location"
+                await timed(timings, f"answer_{answer.lower()}",
+                            page.get_by_text(expected).first.wait_for(timeout=STEP_TIMEOUT_MS))
+    except Exception as e:
+        errors.append(f"session {index}: {e}")
+    finally:
+        await context.close()
+
+
+async def run(url, sessions, rounds, images):
+    from playwright.async_api import async_playwright
+
+    timings, errors = {}, []
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        start = time.perf_counter()
+        await asyncio.gather(*(session(browser, url, i, images, rounds, timings, errors) for i in range(sessions)))
+        wall_seconds = time.perf_counter() - start
+        await browser.close()
+
+    predictions = len(timings.get("predict", []))
+    return {
+        "sessions": sessions,
+        "rounds": rounds,
+        "wall_seconds": wall_seconds,
+        "predictions_per_second": predictions / wall_seconds,
+        "errors": errors,
+        "steps": {step: summarize(values) for step, values in timings.items()},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--url", help="use a running instance instead of starting one")
+    args = parser.parse_args()
+
+    server = None
+    if args.url is None:
+        port = free_port()
+        server = start_server(port)
+        args.url = f"http://127.0.0.1:{port}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        images = []
+        for i, size in enumerate(RESOLUTIONS):
+            path = os.path.join(tmp, f"upload_{size[0]}x{size[1]}.jpg")
+            with open(path, "wb") as f:
+                f.write(synthetic_jpeg(size, seed=i))
+            images.append(path)
+        try:
+            results = asyncio.run(run(args.url, args.sessions, args.rounds, images))
+        finally:
+            if server is not None:
+                server.terminate()
+
+    for step, stats in results["steps"].items():
+        print(f"{step:<12} p50 {stats['p50_ms']:>9.1f} ms  p95 {stats['p95_ms']:>9.1f} ms  (n={stats['n']})")
+    print(f"{results['predictions_per_second']:.2f} predictions/s, {len(results['errors'])} errors")
+    write_results("load_test", results)
@@ -0,0 +1,97 @@
+"""Extract the static UI strings from app.py and pretranslate them.
+
+    python build_catalog.py                  # google translate, writes ui_catalog.json
+    python build_catalog.py --backend stub   # offline, for testing the pipeline
+"""
+import argparse
+import ast
+import itertools
+import json
+
+from translation import BACKENDS
+from ui_catalog import CATALOG_PATH
+from waste_data import LEVEL_NAMES, data, disposal_methods, waste_category_mapping
+
+# Values the placeholders of translate(f"...") calls can take. Expressions not
+# listed here are user data and stay on the runtime translation path.
+DOMAINS = {
+    "disposal_method": sorted(set(disposal_methods.values())),
+    "disposal_method.lower()": sorted({m.lower() for m in disposal_methods.values()}),
+    "waste_type": list(waste_category_mapping),
+    "user_level": LEVEL_NAMES,
+    "idea": [idea for ideas in data.values() for idea in ideas],
+}
+
+BATCH_SIZE = 50
+
+
+def expand(node):
+    """All concrete strings a translate() argument can evaluate to, or None."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return [node.value]
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append([value.value])
+            elif ast.unparse(value.value) in DOMAINS and value.format_spec is None:
+                parts.append(DOMAINS[ast.unparse(value.value)])
+            else:
+                return None
+        return ["".join(combo) for combo in itertools.product(*parts)]
+    return DOMAINS.get(ast.unparse(node))
+
+
+def extract(path):
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    strings, languages, skipped = [], [], []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == "language_options" for t in node.targets
+        ):
+            languages = list(ast.literal_eval(node.value).values())
+        if isinstance(node, ast.Call) and getattr(node.func, "id", None) == "translate" and node.args:
+            values = expand(node.args[0])
+            if values is None:
+                skipped.append(f"line {node.lineno}: {ast.unparse(node.args[0])}")
+            else:
+                strings.extend(values)
+
+    # Category names and upcycling ideas are always shown through translate()
+    strings.extend(DOMAINS["waste_type"] + DOMAINS["idea"])
+    return list(dict.fromkeys(strings)), languages, skipped
+
+
+def build(sources, out_path, backend):
+    strings, languages = [], []
+    for source in sources:
+        found, langs, skipped = extract(source)
+        strings.extend(found)
+        languages.extend(langs)
+        for line in skipped:
+            print(f"{source}: not pretranslated, {line}")
+    strings = list(dict.fromkeys(strings))
+    languages = [lang for lang in dict.fromkeys(languages) if lang != "en"]
+
+    catalog = {"source": strings}
+    for lang in languages:
+        translated = []
+        for i in range(0, len(strings), BATCH_SIZE):
+            translated.extend(backend.translate_many(strings[i:i + BATCH_SIZE], lang))
+        catalog[lang] = translated
+        print(f"{lang}: {len(translated)} strings")
+
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"Wrote {len(strings)} strings x {len(languages)} languages to {out_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sources", nargs="*", default=["app.py"])
+    parser.add_argument("--out", default=CATALOG_PATH)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="google")
+    args = parser.parse_args()
+    build(args.sources, args.out, BACKENDS[args.backend]())
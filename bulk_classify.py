@@ -0,0 +1,253 @@
+"""Classify a whole directory tree or tarball of photos into a CSV or Parquet file.
+
+    python bulk_classify.py /data/dump-2024-06-01 results.csv
+    python bulk_classify.py dump.tar.gz results.parquet --batch-size 256
+    python bulk_classify.py dump.tar.gz results.parquet --restart    # ignore earlier progress
+
+Files are streamed (tarballs are read front to back, never extracted) and
+decoded and resized in a thread pool ahead of the model, which classifies them
+with the same prediction, category and disposal logic as the app's batch
+uploader. Results are appended to the output and committed every
+--checkpoint-every images: the CSV is fsynced, and a Parquet output (needs
+pyarrow) is a directory that gets one part file per checkpoint. The byte
+offset or part count is recorded in <output>.checkpoint.json. An interrupted run started
+again with the same arguments drops anything written after the last
+checkpoint and skips every file already in the output.
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import shutil
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import inference_backends
+import model_registry
+import worker_pool
+from batch_predict import IMAGE_EXTENSIONS, classify_stream
+from preprocessing import IMAGE_SIZE
+
+COLUMNS = ["file", "predicted_class", "waste_type", "disposal_method", "confidence"]
+CHECKPOINT_EVERY = 2000
+DECODE_WORKERS = os.cpu_count() or 1
+MIN_BATCH, MAX_BATCH = 32, 512
+
+
+def iter_directory(root, done):
+    """(path relative to `root`, absolute path) of every image, in a stable order."""
+    for directory, subdirs, files in os.walk(root):
+        subdirs.sort()
+        for filename in sorted(files):
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, "/")
+            if filename.lower().endswith(IMAGE_EXTENSIONS) and name not in done:
+                yield name, path
+
+
+def iter_tarball(path, done):
+    """(member name, bytes) of every image, read as a stream (r|*, any compression)."""
+    with tarfile.open(path, "r|*") as archive:
+        for member in archive:
+            if member.isfile() and member.name.lower().endswith(IMAGE_EXTENSIONS) and member.name not in done:
+                yield member.name, archive.extractfile(member).read()
+
+
+def iter_sources(source, done=()):
+    return iter_directory(source, done) if os.path.isdir(source) else iter_tarball(source, done)
+
+
+def available_memory():
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return 4 << 30
+
+
+def auto_batch_size(model):
+    """Largest batch the machine keeps busy without holding much of its free memory."""
+    if isinstance(model, worker_pool.WorkerPool):
+        by_cpu = worker_pool.MAX_BATCH * model.size
+    else:
+        by_cpu = 16 * (os.cpu_count() or 1)
+    # float32 model input plus two prefetched uint8 images per slot, within 5% of free memory
+    per_image = IMAGE_SIZE[0] * IMAGE_SIZE[1] * 3 * (4 + 2)
+    by_memory = int(available_memory() * 0.05) // per_image
+    size = min(MAX_BATCH, by_cpu, by_memory)
+    return max(MIN_BATCH, size - size % MIN_BATCH)
+
+
+class SpreadPredict:
+    """Splits each batch across a WorkerPool so every worker process runs at once.
+
+    WorkerPool.predict() hands a whole batch to a single worker, which suits
+    the app's one-image requests but would leave the others idle here.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.executor = ThreadPoolExecutor(max_workers=pool.size)
+
+    def predict(self, batch):
+        size = -(-len(batch) // self.pool.size)
+        parts = [batch[i:i + size] for i in range(0, len(batch), size)]
+        return np.concatenate(list(self.executor.map(self.pool.predict, parts)))
+
+
+class CsvOutput:
+    def __init__(self, path, checkpoint):
+        self.done = set()
+        if os.path.exists(path):
+            # Rows after the last checkpoint may be cut off mid-line, they are redone
+            with open(path, "r+b") as f:
+                f.truncate(checkpoint.get("bytes", 0))
+            with open(path, newline="", encoding="utf-8") as f:
+                self.done = {row["file"] for row in csv.DictReader(f)}
+        self.file = open(path, "a", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, COLUMNS)
+        if self.file.tell() == 0:
+            self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def commit(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return {"bytes": self.file.tell()}
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetOutput:
+    """A directory of part files, each written in full at a checkpoint."""
+
+    def __init__(self, path, checkpoint):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow (pip install pyarrow), or write a .csv instead")
+
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.schema = pa.schema([(c, pa.float64() if c == "confidence" else pa.string()) for c in COLUMNS])
+        os.makedirs(path, exist_ok=True)
+        for leftover in glob.glob(os.path.join(path, "*.tmp")):
+            os.remove(leftover)
+        self.parts = checkpoint.get("parts", 0)
+        # A part renamed into place just before a crash, after the last checkpoint, is kept
+        while os.path.exists(self._part(self.parts)):
+            self.parts += 1
+        self.done = set()
+        for i in range(self.parts):
+            self.done.update(pq.read_table(self._part(i), columns=["file"]).column("file").to_pylist())
+        self.rows = []
+
+    def _part(self, i):
+        return os.path.join(self.path, f"part-{i:05d}.parquet")
+
+    def write(self, rows):
+        self.rows.extend(rows)
+
+    def commit(self):
+        if self.rows:
+            tmp = self._part(self.parts) + ".tmp"
+            self.pq.write_table(self.pa.Table.from_pylist(self.rows, self.schema), tmp)
+            os.replace(tmp, self._part(self.parts))
+            self.parts += 1
+            self.rows = []
+        return {"parts": self.parts}
+
+    def close(self):
+        pass
+
+
+def checkpoint_path(out):
+    return out.rstrip("/\\") + ".checkpoint.json"
+
+
+def save_checkpoint(out, state):
+    tmp = checkpoint_path(out) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({**state, "updated_at": time.time()}, f)
+    os.replace(tmp, checkpoint_path(out))
+
+
+def open_output(source, out, restart=False):
+    checkpoint = {}
+    if restart:
+        if os.path.isdir(out):
+            shutil.rmtree(out)
+        for path in (out, checkpoint_path(out)):
+            if os.path.isfile(path):
+                os.remove(path)
+    elif os.path.exists(checkpoint_path(out)):
+        with open(checkpoint_path(out), encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint["source"] != os.path.abspath(source):
+            raise SystemExit(f"{out} holds results for {checkpoint['source']}, pass --restart to overwrite it")
+    elif os.path.exists(out):
+        raise SystemExit(f"{out} exists but was not written by this tool, pass --restart to overwrite it")
+
+    output = (ParquetOutput if out.endswith(".parquet") else CsvOutput)(out, checkpoint)
+    save_checkpoint(out, {"source": os.path.abspath(source), "rows": len(output.done), **output.commit()})
+    return output
+
+
+def run(source, out, backend=inference_backends.BACKEND, keras_path=inference_backends.KERAS_PATH,
+        batch_size=0, workers=DECODE_WORKERS, checkpoint_every=CHECKPOINT_EVERY, restart=False):
+    output = open_output(source, out, restart)
+    if output.done:
+        print(f"Resuming: {len(output.done)} files already in {out}")
+    model = model_registry.get_backend(backend, keras_path)
+    batch_size = batch_size or auto_batch_size(model)
+    if isinstance(model, worker_pool.WorkerPool):
+        model = SpreadPredict(model)
+    print(f"Batches of {batch_size}, {workers} decode threads")
+
+    rows_total, unreadable, pending = len(output.done), 0, 0
+    start = time.perf_counter()
+    classified = 0
+    try:
+        for rows in classify_stream(model, iter_sources(source, output.done), batch_size, workers):
+            output.write(rows)
+            classified += len(rows)
+            unreadable += sum(1 for row in rows if row["predicted_class"] is None)
+            pending += len(rows)
+            if pending >= checkpoint_every:
+                save_checkpoint(out, {"source": os.path.abspath(source), "rows": rows_total + classified,
+                                      **output.commit()})
+                pending = 0
+                elapsed = time.perf_counter() - start
+                print(f"{rows_total + classified} files ({classified / elapsed:.1f} images/s)")
+    finally:
+        # Also on Ctrl-C: every batch handed to write() is complete, so keep it
+        save_checkpoint(out, {"source": os.path.abspath(source), "rows": rows_total + classified, **output.commit()})
+        output.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Classified {classified} files in {elapsed:.1f}s ({classified / max(elapsed, 1e-9):.1f} images/s), "
+          f"{unreadable} unreadable, {rows_total + classified} total in {out}")
+    return {"classified": classified, "unreadable": unreadable, "total": rows_total + classified, "seconds": elapsed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="directory or tar archive (.tar, .tar.gz, .tar.bz2, .tar.xz)")
+    parser.add_argument("out", help="results file, .csv or .parquet")
+    parser.add_argument("--backend", default=inference_backends.BACKEND)
+    parser.add_argument("--model", default=inference_backends.KERAS_PATH)
+    parser.add_argument("--batch-size", type=int, default=0, help="0 sizes batches to the machine")
+    parser.add_argument("--decode-workers", type=int, default=DECODE_WORKERS)
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY, help="images between checkpoints")
+    parser.add_argument("--restart", action="store_true", help="discard existing results and start over")
+    args = parser.parse_args()
+
+    run(args.source, args.out, args.backend, args.model, args.batch_size, args.decode_workers,
+        args.checkpoint_every, args.restart)
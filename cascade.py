@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from waste_data import class_names, lookup_category
+
+# The cheap first stage, e.g. the ResNet50V2 head the notebook saves
+FAST_MODEL = os.environ.get("CASCADE_FAST_MODEL", os.path.join("saved_models", "ResNet50V2.keras"))
+FAST_BACKEND = os.environ.get("CASCADE_FAST_BACKEND", "keras")
+# Below this top-1 confidence the image goes to DenseNet201
+THRESHOLD = float(os.environ.get("CASCADE_THRESHOLD", "0.85"))
+# Top-2 classes from different waste categories closer than this also escalate
+AMBIGUOUS_MARGIN = float(os.environ.get("CASCADE_AMBIGUOUS_MARGIN", "0.2"))
+
+# Waste category index of every class, to spot top-2 disagreements
+_categories = sorted({lookup_category(name)[0] for name in class_names})
+CLASS_CATEGORY = np.array([_categories.index(lookup_category(name)[0]) for name in class_names])
+
+
+def needs_second_stage(probs, threshold=THRESHOLD, ambiguous_margin=AMBIGUOUS_MARGIN):
+    """Boolean mask of the rows of `probs` the fast model isn't sure about."""
+    top2 = np.argsort(probs, axis=1)[:, -2:]
+    top1_p = probs[np.arange(len(probs)), top2[:, 1]]
+    top2_p = probs[np.arange(len(probs)), top2[:, 0]]
+    ambiguous = (CLASS_CATEGORY[top2[:, 0]] != CLASS_CATEGORY[top2[:, 1]]) & (top1_p - top2_p < ambiguous_margin)
+    return (top1_p < threshold) | ambiguous
+
+
+class CascadeBackend:
+    name = "cascade"
+
+    def __init__(self, fast, accurate, threshold=THRESHOLD, ambiguous_margin=AMBIGUOUS_MARGIN):
+        self.fast = fast
+        self.accurate = accurate
+        self.threshold = threshold
+        self.ambiguous_margin = ambiguous_margin
+        self.counters = {"images": 0, "escalated": 0, "fast_seconds": 0.0, "accurate_seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def predict(self, batch, rows=None):
+        """Probabilities for the first `rows` images of `batch` (all by default).
+
+        batch_predict pads its batches to a fixed size; the padding rows go
+        through the fast model with the rest but are never escalated or counted.
+        """
+        rows = len(batch) if rows is None else rows
+        start = time.perf_counter()
+        probs = np.array(self.fast.predict(batch)[:rows], dtype=np.float32)
+        fast_seconds = time.perf_counter() - start
+
+        escalate = np.flatnonzero(needs_second_stage(probs, self.threshold, self.ambiguous_margin))
+        accurate_seconds = 0.0
+        if len(escalate):
+            start = time.perf_counter()
+            # Padded to a power of two, so the accurate model only ever sees a
+            # few batch shapes instead of retracing for every escalation count
+            size = min(len(batch), 1 << (len(escalate) - 1).bit_length())
+            second = np.zeros((size,) + batch.shape[1:], dtype=batch.dtype)
+            second[:len(escalate)] = batch[escalate]
+            probs[escalate] = self.accurate.predict(second)[:len(escalate)]
+            accurate_seconds = time.perf_counter() - start
+
+        with self._lock:
+            self.counters["images"] += rows
+            self.counters["escalated"] += len(escalate)
+            self.counters["fast_seconds"] += fast_seconds
+            self.counters["accurate_seconds"] += accurate_seconds
+        return probs
+
+    def stats(self):
+        images = self.counters["images"]
+        if not images:
+            return dict(self.counters)
+        return {
+            **self.counters,
+            "fast_hit_rate": 1 - self.counters["escalated"] / images,
+            "escalation_rate": self.counters["escalated"] / images,
+            "mean_ms_per_image": 1000 * (self.counters["fast_seconds"] + self.counters["accurate_seconds"]) / images,
+        }
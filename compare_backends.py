@@ -0,0 +1,69 @@
+"""Accuracy and latency of each inference backend on the 30-class test split.
+
+    python compare_backends.py                       # all backends that have been exported
+    python compare_backends.py --out backend_report.json
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from inference_backends import KERAS_PATH, TFLITE_SUFFIXES, load_backend, tflite_path
+from training.dataset import DATASET_DIR, build_img_dataset, iter_batches, load_image_array
+
+
+def evaluate(backend, X_test, y_test, latency_samples):
+    correct = 0
+    for batch, labels in iter_batches(X_test, y_test):
+        correct += int(np.sum(np.argmax(backend.predict(batch), axis=1) == labels))
+
+    # Latency for one image, which is what the app does per "Predict" click
+    timings = []
+    for path in X_test[:latency_samples]:
+        x = load_image_array(path)[None, ...]
+        start = time.perf_counter()
+        backend.predict(x)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "accuracy": correct / len(X_test),
+        "latency_ms_p50": float(np.percentile(timings, 50)),
+        "latency_ms_p95": float(np.percentile(timings, 95)),
+    }
+
+
+def compare(keras_path, dataset_dir, latency_samples):
+    _, _, _, _, X_test, y_test, _ = build_img_dataset(dataset_dir)
+
+    report = {}
+    for name in ["keras"] + list(TFLITE_SUFFIXES):
+        path = keras_path if name == "keras" else tflite_path(keras_path, name)
+        if not os.path.exists(path):
+            print(f"Skipping {name}: {path} not found (run export_tflite.py)")
+            continue
+        backend = load_backend(name, keras_path)
+        backend.predict(np.zeros((1, 224, 224, 3), dtype=np.float32))  # warmup
+        report[name] = evaluate(backend, X_test, y_test, latency_samples)
+        report[name]["size_mb"] = os.path.getsize(path) / 1e6
+        report[name]["test_images"] = len(X_test)
+
+    print(f"{'backend':<12} {'accuracy':>9} {'p50 ms':>8} {'p95 ms':>8} {'size MB':>8}")
+    for name, r in report.items():
+        print(f"{name:<12} {r['accuracy']:>9.4f} {r['latency_ms_p50']:>8.1f} "
+              f"{r['latency_ms_p95']:>8.1f} {r['size_mb']:>8.1f}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=KERAS_PATH)
+    parser.add_argument("--dataset-dir", default=DATASET_DIR)
+    parser.add_argument("--latency-samples", type=int, default=100)
+    parser.add_argument("--out", default="backend_report.json")
+    args = parser.parse_args()
+
+    report = compare(args.model, args.dataset_dir, args.latency_samples)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import numpy as np
+
+import db
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def _init_schema():
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        conn = db.get_connection()
+        with db.lock:
+            conn.executescript("""
+                -- "Wrong? pick the right class" answers, with the image's embedding so
+                -- the classifier can be fine-tuned without running the backbone again
+                CREATE TABLE IF NOT EXISTS corrections (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER,
+                    content_hash TEXT,
+                    predicted_class TEXT,
+                    corrected_class TEXT,
+                    embedding BLOB,
+                    created_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_corrections_hash ON corrections (content_hash);
+            """)
+            conn.commit()
+        _schema_ready = True
+
+
+# --------------------------- PUBLIC API -----------------------------
+
+def add(user_id, content_hash, predicted_class, corrected_class, embedding=None):
+    _init_schema()
+    if embedding is not None:
+        embedding = np.asarray(embedding, dtype=np.float32).tobytes()
+    db.execute(
+        "INSERT INTO corrections (user_id, content_hash, predicted_class, corrected_class, embedding, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (user_id, content_hash, predicted_class, corrected_class, embedding, time.time()),
+    )
+
+
+def count(after_id=0):
+    """Corrections with an embedding (the ones fine-tuning can use) newer than `after_id`."""
+    _init_schema()
+    return db.query_one("SELECT COUNT(*) FROM corrections WHERE id > ? AND embedding IS NOT NULL", (after_id,))[0]
+
+
+def training_set():
+    """(last id, embeddings, corrected class names), the latest answer per image.
+
+    If several users corrected the same image, the most recent answer wins.
+    """
+    _init_schema()
+    rows = db.query("""
+        SELECT id, embedding, corrected_class FROM corrections
+        WHERE id IN (SELECT MAX(id) FROM corrections WHERE embedding IS NOT NULL GROUP BY content_hash)
+        ORDER BY id
+    """)
+    if not rows:
+        return 0, np.zeros((0, 0), dtype=np.float32), []
+    last_id = db.query_one("SELECT MAX(id) FROM corrections")[0]
+    embeddings = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+    return last_id, embeddings, [row[2] for row in rows]
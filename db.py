@@ -0,0 +1,162 @@
+import sqlite3
+import threading
+import time
+
+DB_PATH = "waste_management.db"
+
+# One connection per process, shared by every session. sqlite3 connections
+# aren't safe to use from two threads at once, so every use holds `lock`.
+lock = threading.RLock()
+_conn = None
+has_fts = False
+
+
+def get_connection():
+    global _conn
+    if _conn is None:
+        with lock:
+            if _conn is None:
+                conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=10, cached_statements=256)
+                # WAL lets readers (other processes, e.g. inference_service.py)
+                # run while a write is in progress
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                _init(conn)
+                _conn = conn
+    return _conn
+
+
+def execute(sql, args=()):
+    with lock:
+        conn = get_connection()
+        cursor = conn.execute(sql, args)
+        conn.commit()
+        return cursor
+
+
+def executemany(sql, rows):
+    with lock:
+        conn = get_connection()
+        conn.executemany(sql, rows)
+        conn.commit()
+
+
+def query(sql, args=()):
+    with lock:
+        return get_connection().execute(sql, args).fetchall()
+
+
+def query_one(sql, args=()):
+    with lock:
+        return get_connection().execute(sql, args).fetchone()
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _init(conn):
+    global has_fts
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS waste_data (
+            id INTEGER PRIMARY KEY,
+            waste_type TEXT,
+            description TEXT,
+            upcycling_idea TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS community_ideas (
+            id INTEGER PRIMARY KEY,
+            user_name TEXT,
+            idea TEXT,
+            created_at REAL DEFAULT 0
+        )
+    """)
+    # Databases from before created_at existed: old ideas sort first, by id
+    if "created_at" not in _columns(conn, "community_ideas"):
+        conn.execute("ALTER TABLE community_ideas ADD COLUMN created_at REAL DEFAULT 0")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_community_ideas_created ON community_ideas (created_at, id)")
+
+    # Full-text search over ideas, kept in sync by triggers
+    try:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'community_ideas_fts'"
+        ).fetchone()
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS community_ideas_fts
+            USING fts5(idea, user_name, content='community_ideas', content_rowid='id')
+        """)
+        conn.executescript("""
+            CREATE TRIGGER IF NOT EXISTS community_ideas_ai AFTER INSERT ON community_ideas BEGIN
+                INSERT INTO community_ideas_fts (rowid, idea, user_name) VALUES (new.id, new.idea, new.user_name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS community_ideas_ad AFTER DELETE ON community_ideas BEGIN
+                INSERT INTO community_ideas_fts (community_ideas_fts, rowid, idea, user_name)
+                VALUES ('delete', old.id, old.idea, old.user_name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS community_ideas_au AFTER UPDATE ON community_ideas BEGIN
+                INSERT INTO community_ideas_fts (community_ideas_fts, rowid, idea, user_name)
+                VALUES ('delete', old.id, old.idea, old.user_name);
+                INSERT INTO community_ideas_fts (rowid, idea, user_name) VALUES (new.id, new.idea, new.user_name);
+            END;
+        """)
+        if not exists:
+            # Index the ideas that were there before the FTS table
+            conn.execute("INSERT INTO community_ideas_fts (community_ideas_fts) VALUES ('rebuild')")
+        has_fts = True
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5, search_ideas falls back to LIKE
+        has_fts = False
+    conn.commit()
+
+
+# ------------------------- COMMUNITY IDEAS --------------------------
+
+def add_idea(user_name, idea):
+    execute(
+        "INSERT INTO community_ideas (user_name, idea, created_at) VALUES (?, ?, ?)",
+        (user_name, idea, time.time()),
+    )
+
+
+def recent_ideas(limit=20, before=None):
+    """Newest ideas first, `limit` at a time.
+
+    Returns (rows, cursor): pass `cursor` as `before` to get the next page. This
+    is a keyset query on the (created_at, id) index, so every page costs the
+    same however many ideas there are.
+    """
+    if before is None:
+        rows = query(
+            "SELECT id, user_name, idea, created_at FROM community_ideas "
+            "ORDER BY created_at DESC, id DESC LIMIT ?",
+            (limit,),
+        )
+    else:
+        rows = query(
+            "SELECT id, user_name, idea, created_at FROM community_ideas "
+            "WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?",
+            (before[0], before[1], limit),
+        )
+    cursor = (rows[-1][3], rows[-1][0]) if len(rows) == limit else None
+    return rows, cursor
+
+
+def search_ideas(text, limit=20):
+    if not text.strip():
+        return []
+    if has_fts:
+        # Quote every word so user input can't be parsed as FTS query syntax
+        match = " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+        return query(
+            "SELECT c.id, c.user_name, c.idea, c.created_at FROM community_ideas_fts f "
+            "JOIN community_ideas c ON c.id = f.rowid WHERE community_ideas_fts MATCH ? "
+            "ORDER BY f.rank LIMIT ?",
+            (match, limit),
+        )
+    return query(
+        "SELECT id, user_name, idea, created_at FROM community_ideas WHERE idea LIKE ? "
+        "ORDER BY created_at DESC, id DESC LIMIT ?",
+        (f"%{text}%", limit),
+    )
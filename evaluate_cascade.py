@@ -0,0 +1,84 @@
+"""Accuracy, stage hit rates and latency of the cascade on the test split.
+
+    python evaluate_cascade.py                                   # ResNet50V2 -> DenseNet201
+    python evaluate_cascade.py --fast saved_models/EfficientNetV2.keras --out cascade_report.json
+
+Both models run once over the test split; the cascade is then replayed for a
+range of thresholds, so picking CASCADE_THRESHOLD costs no extra inference.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+import cascade
+from inference_backends import KERAS_PATH, load_backend
+from training.dataset import DATASET_DIR, build_img_dataset, iter_batches, load_image_array
+
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.99]
+
+
+def run(backend, X_test, y_test, latency_samples):
+    probs = np.concatenate([backend.predict(batch) for batch, _ in iter_batches(X_test, y_test)])
+    timings = []
+    for path in X_test[:latency_samples]:
+        x = load_image_array(path)[None, ...]
+        start = time.perf_counter()
+        backend.predict(x)
+        timings.append((time.perf_counter() - start) * 1000)
+    return probs, float(np.mean(timings))
+
+
+def evaluate(fast_path, fast_backend, accurate_path, dataset_dir, margin, latency_samples):
+    _, _, _, _, X_test, y_test, _ = build_img_dataset(dataset_dir)
+    y_test = np.asarray(y_test)
+
+    fast_probs, fast_ms = run(load_backend(fast_backend, fast_path), X_test, y_test, latency_samples)
+    accurate_probs, accurate_ms = run(load_backend("keras", accurate_path), X_test, y_test, latency_samples)
+    fast_pred = np.argmax(fast_probs, axis=1)
+    accurate_pred = np.argmax(accurate_probs, axis=1)
+
+    report = {
+        "fast": {"model": fast_path, "accuracy": float(np.mean(fast_pred == y_test)), "ms_per_image": fast_ms},
+        "accurate": {"model": accurate_path, "accuracy": float(np.mean(accurate_pred == y_test)),
+                     "ms_per_image": accurate_ms},
+        "ambiguous_margin": margin,
+        "cascade": [],
+    }
+    print(f"fast only:     accuracy {report['fast']['accuracy']:.4f}  {fast_ms:.1f} ms/image")
+    print(f"accurate only: accuracy {report['accurate']['accuracy']:.4f}  {accurate_ms:.1f} ms/image")
+    print(f"{'threshold':>9} {'accuracy':>9} {'fast hits':>10} {'escalated':>10} {'ms/image':>9}")
+
+    for threshold in THRESHOLDS:
+        escalate = cascade.needs_second_stage(fast_probs, threshold, margin)
+        pred = np.where(escalate, accurate_pred, fast_pred)
+        row = {
+            "threshold": threshold,
+            "accuracy": float(np.mean(pred == y_test)),
+            "fast_hit_rate": float(1 - escalate.mean()),
+            "escalation_rate": float(escalate.mean()),
+            # Escalated images pay for both stages
+            "ms_per_image": fast_ms + float(escalate.mean()) * accurate_ms,
+        }
+        report["cascade"].append(row)
+        print(f"{threshold:>9.2f} {row['accuracy']:>9.4f} {row['fast_hit_rate']:>10.2%} "
+              f"{row['escalation_rate']:>10.2%} {row['ms_per_image']:>9.1f}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fast", default=cascade.FAST_MODEL)
+    parser.add_argument("--fast-backend", default=cascade.FAST_BACKEND)
+    parser.add_argument("--accurate", default=KERAS_PATH)
+    parser.add_argument("--dataset-dir", default=DATASET_DIR)
+    parser.add_argument("--ambiguous-margin", type=float, default=cascade.AMBIGUOUS_MARGIN)
+    parser.add_argument("--latency-samples", type=int, default=100)
+    parser.add_argument("--out", default="cascade_report.json")
+    args = parser.parse_args()
+
+    report = evaluate(args.fast, args.fast_backend, args.accurate, args.dataset_dir,
+                      args.ambiguous_margin, args.latency_samples)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
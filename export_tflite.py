@@ -0,0 +1,60 @@
+"""Convert a trained Keras model to float16 and int8-quantized TFLite models.
+
+    python export_tflite.py                          # DenseNet201.keras, calibrated on images/images
+    python export_tflite.py --model saved_models/ResNet50V2.keras --calibration-images 300
+"""
+import argparse
+import os
+import random
+
+import tensorflow as tf
+
+from inference_backends import KERAS_PATH, tflite_path
+from training.dataset import DATASET_DIR, build_img_dataset, load_image_array
+
+
+def representative_dataset(paths):
+    # The converter calls this to record activation ranges for int8 calibration
+    def gen():
+        for path in paths:
+            yield [load_image_array(path)[None, ...]]
+    return gen
+
+
+def export(keras_path, calibration_paths):
+    model = tf.keras.models.load_model(keras_path, compile=False)
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float16]
+    fp16_path = tflite_path(keras_path, "tflite-fp16")
+    with open(fp16_path, "wb") as f:
+        f.write(converter.convert())
+    print(f"Wrote {fp16_path} ({os.path.getsize(fp16_path) / 1e6:.1f} MB)")
+
+    # Full-integer weights and activations; input/output stay float32 so the
+    # backend can be swapped without changing the preprocessing
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset(calibration_paths)
+    converter.target_spec.supported_ops = [
+        tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+        tf.lite.OpsSet.TFLITE_BUILTINS,
+    ]
+    int8_path = tflite_path(keras_path, "tflite-int8")
+    with open(int8_path, "wb") as f:
+        f.write(converter.convert())
+    print(f"Wrote {int8_path} ({os.path.getsize(int8_path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=KERAS_PATH)
+    parser.add_argument("--dataset-dir", default=DATASET_DIR)
+    parser.add_argument("--calibration-images", type=int, default=200)
+    args = parser.parse_args()
+
+    # Calibrate on training images only, the test split is kept for compare_backends.py
+    X_train, y_train, *_ = build_img_dataset(args.dataset_dir)
+    calibration = random.Random(0).sample(X_train, min(args.calibration_images, len(X_train)))
+    export(args.model, calibration)
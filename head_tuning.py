@@ -0,0 +1,172 @@
+"""Background fine-tuning of the classifier's last Dense layer on user corrections.
+
+Every HEAD_TUNING_INTERVAL seconds, once at least HEAD_TUNING_MIN_CORRECTIONS
+new corrections (with embeddings) have come in, the final Dense layer is
+refit in NumPy on the penultimate-layer embeddings of every corrected image
+plus a replay sample of training images from the embedding index, starting
+from and pulled towards the current weights. No backbone pass is needed.
+The new weights are swapped into the running model only if accuracy on the
+replay sample holds, saved to head_weights/, and applied again when the
+model is next loaded.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+import corrections
+import embedding_index
+import prediction_cache
+from waste_data import class_names
+
+INTERVAL = float(os.environ.get("HEAD_TUNING_INTERVAL", "3600"))
+MIN_CORRECTIONS = int(os.environ.get("HEAD_TUNING_MIN_CORRECTIONS", "20"))
+WEIGHTS_DIR = "head_weights"
+# Replayed training images per correction, so the head doesn't forget the rest
+REPLAY_PER_CORRECTION = 5
+# A swap is rejected if replay accuracy drops by more than this
+MAX_ACCURACY_DROP = 0.02
+STEPS = 300
+# Step size relative to 1 / mean squared embedding norm, which keeps gradient
+# descent stable whatever the scale of the activations
+LEARNING_RATE = 1.0
+# L2 pull towards the starting weights
+ANCHOR = 1e-3
+
+
+def weights_path(keras_path):
+    return os.path.join(WEIGHTS_DIR, os.path.splitext(os.path.basename(keras_path))[0] + "_head.npz")
+
+
+def load_saved(backend):
+    """Apply previously tuned weights to a freshly loaded backend, returns the last correction id used."""
+    path = weights_path(backend.path)
+    if not os.path.exists(path):
+        return 0
+    saved = np.load(path)
+    kernel, bias = backend.head_weights()
+    if saved["kernel"].shape != kernel.shape:
+        print(f"Ignoring {path}: shape {saved['kernel'].shape} does not match the model's {kernel.shape}")
+        return 0
+    backend.set_head_weights(saved["kernel"], saved["bias"])
+    return int(saved["last_correction_id"])
+
+
+def replay_sample(n, seed=None):
+    """(embeddings, labels) of up to `n` random training images, empty without an index."""
+    index = embedding_index.get_index()
+    if index is None or index.norms is None or n == 0:
+        return None, None
+    rows = np.sort(np.random.default_rng(seed).choice(len(index), min(n, len(index)), replace=False))
+    # The index stores unit vectors, the norms turn them back into activations
+    vectors = np.asarray(index.vectors[rows], dtype=np.float32) * np.asarray(index.norms[rows])[:, None]
+    return vectors, np.asarray(index.labels[rows], dtype=np.int64)
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def accuracy(kernel, bias, x, y):
+    return float(np.mean(np.argmax(x @ kernel + bias, axis=1) == y))
+
+
+def fine_tune(kernel, bias, x, y, steps=STEPS, learning_rate=LEARNING_RATE, anchor=ANCHOR):
+    """Full-batch gradient descent on softmax cross-entropy, anchored to the starting weights."""
+    start_kernel = kernel.astype(np.float32)
+    kernel, bias = start_kernel.copy(), bias.astype(np.float32).copy()
+    targets = np.eye(kernel.shape[1], dtype=np.float32)[y]
+    step = learning_rate / max(float(np.mean(np.sum(x * x, axis=1))), 1.0)
+    for _ in range(steps):
+        error = (_softmax(x @ kernel + bias) - targets) / len(x)
+        kernel -= step * (x.T @ error + anchor * (kernel - start_kernel))
+        bias -= step * error.sum(axis=0)
+    return kernel, bias
+
+
+def tune(backend):
+    """Refit on all corrections and swap the result in; returns a summary, or None if nothing changed."""
+    last_id, x_corrected, names = corrections.training_set()
+    kernel, bias = backend.head_weights()
+    keep = [i for i, name in enumerate(names) if name in class_names]
+    if not keep or x_corrected.shape[1] != kernel.shape[0]:
+        return None
+    x_corrected = x_corrected[keep]
+    y_corrected = np.array([class_names.index(names[i]) for i in keep])
+
+    x_replay, y_replay = replay_sample(REPLAY_PER_CORRECTION * len(keep))
+    x, y = x_corrected, y_corrected
+    if x_replay is not None:
+        x, y = np.concatenate([x_corrected, x_replay]), np.concatenate([y_corrected, y_replay])
+
+    start = time.perf_counter()
+    new_kernel, new_bias = fine_tune(kernel, bias, x, y)
+    summary = {
+        "corrections": len(keep),
+        "replay": 0 if x_replay is None else len(x_replay),
+        "seconds": round(time.perf_counter() - start, 3),
+        "corrected_accuracy": accuracy(new_kernel, new_bias, x_corrected, y_corrected),
+    }
+    if x_replay is not None:
+        summary["replay_accuracy_before"] = accuracy(kernel, bias, x_replay, y_replay)
+        summary["replay_accuracy_after"] = accuracy(new_kernel, new_bias, x_replay, y_replay)
+        if summary["replay_accuracy_after"] < summary["replay_accuracy_before"] - MAX_ACCURACY_DROP:
+            print(f"Head tuning rejected, replay accuracy would drop: {summary}")
+            return None
+
+    # Saved before the swap, so a failed swap still leaves the weights for the next start
+    os.makedirs(WEIGHTS_DIR, exist_ok=True)
+    tmp = weights_path(backend.path) + ".tmp.npz"
+    np.savez(tmp, kernel=new_kernel, bias=new_bias, last_correction_id=last_id, created_at=time.time())
+    os.replace(tmp, weights_path(backend.path))
+    backend.set_head_weights(new_kernel, new_bias)
+    # Cached predictions came from the old weights
+    prediction_cache.get_cache().clear()
+    summary["last_correction_id"] = last_id
+    print(f"Head tuned and swapped in: {summary}")
+    return summary
+
+
+class HeadTuner:
+    def __init__(self, backend, last_id=0, interval=INTERVAL, min_corrections=MIN_CORRECTIONS):
+        self.backend = backend
+        self.last_id = last_id
+        self.interval = interval
+        self.min_corrections = min_corrections
+        self.runs = []
+        self._thread = threading.Thread(target=self._run, name="head-tuner", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                if corrections.count(self.last_id) >= self.min_corrections:
+                    summary = tune(self.backend)
+                    if summary is not None:
+                        self.last_id = summary["last_correction_id"]
+                        self.runs.append(summary)
+            except Exception as e:
+                # Keep the schedule alive, the next interval tries again
+                print(f"head-tuner: {e}")
+
+
+_tuner = None
+_tuner_lock = threading.Lock()
+
+
+def start(backend):
+    """Start the schedule once per process, for backends whose head can be swapped.
+
+    Keras backends and worker pools of them have a head_version, TFLite and
+    cascade backends don't and are left alone.
+    """
+    global _tuner
+    if _tuner is None and getattr(backend, "head_version", None) is not None:
+        with _tuner_lock:
+            if _tuner is None:
+                _tuner = HeadTuner(backend, backend.head_version)
+    return _tuner
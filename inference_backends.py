@@ -0,0 +1,122 @@
+import os
+import threading
+
+import numpy as np
+
+import artifacts
+
+# Which backend the app runs: keras, tflite-fp16, tflite-int8 or cascade
+BACKEND = os.environ.get("INFERENCE_BACKEND", "keras")
+
+KERAS_PATH = "DenseNet201.keras"
+# Written by export_tflite.py next to the Keras model, e.g. DenseNet201_int8.tflite
+TFLITE_SUFFIXES = {
+    "tflite-fp16": "fp16",
+    "tflite-int8": "int8",
+}
+
+
+def set_thread_budget(threads):
+    """Size TensorFlow's thread pools, before TensorFlow runs anything in this process."""
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(min(2, threads))
+
+
+def tflite_path(keras_path, name):
+    return f"{os.path.splitext(keras_path)[0]}_{TFLITE_SUFFIXES[name]}.tflite"
+
+
+class KerasBackend:
+    name = "keras"
+
+    def __init__(self, path=KERAS_PATH):
+        from tensorflow.keras.models import load_model
+        # Local file or verified cached copy, see artifacts.json
+        self.path = artifacts.resolve(path)
+        self.model = load_model(self.path, compile=False)
+        self._embedder = None
+        self._embedder_lock = threading.Lock()
+        # Weights fine-tuned on user corrections, if any (see head_tuning.py)
+        import head_tuning
+        self.head_version = head_tuning.load_saved(self)
+
+    def predict(self, batch):
+        # predict_on_batch skips the tf.data/callback machinery of predict(),
+        # which dominates the cost for small batches
+        return np.asarray(self.model.predict_on_batch(batch))
+
+    def predict_with_embeddings(self, batch):
+        """(probabilities, penultimate-layer embeddings) from one forward pass."""
+        if self._embedder is None:
+            import tensorflow as tf
+            with self._embedder_lock:
+                if self._embedder is None:
+                    # layers[-2] is the Dropout after Dense(512), the identity at inference
+                    self._embedder = tf.keras.Model(self.model.input, [self.model.output, self.model.layers[-2].output])
+        probs, embeddings = self._embedder.predict_on_batch(batch)
+        return np.asarray(probs), np.asarray(embeddings)
+
+    def head_weights(self):
+        kernel, bias = self.model.layers[-1].get_weights()
+        return kernel, bias
+
+    def set_head_weights(self, kernel, bias):
+        # Variable assignment, safe while other threads predict: a pass sees
+        # the old or the new weights, the embedder shares the same layer
+        self.model.layers[-1].set_weights([kernel, bias])
+
+
+class TFLiteBackend:
+    def __init__(self, name, path):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+        self.name = name
+        self.path = path
+        self.interpreter = Interpreter(model_path=path, num_threads=os.cpu_count())
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        # The interpreter holds mutable tensors, so calls must not overlap
+        self._lock = threading.Lock()
+
+    def _quantize(self, batch):
+        scale, zero_point = self.input["quantization"]
+        if self.input["dtype"] == np.float32 or scale == 0:
+            return batch.astype(self.input["dtype"], copy=False)
+        info = np.iinfo(self.input["dtype"])
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(self.input["dtype"])
+
+    def _dequantize(self, output):
+        scale, zero_point = self.output["quantization"]
+        if self.output["dtype"] == np.float32 or scale == 0:
+            return output.astype(np.float32, copy=False)
+        return (output.astype(np.float32) - zero_point) * scale
+
+    def predict(self, batch):
+        with self._lock:
+            if tuple(self.input["shape"]) != batch.shape:
+                self.interpreter.resize_tensor_input(self.input["index"], batch.shape)
+                self.interpreter.allocate_tensors()
+                self.input = self.interpreter.get_input_details()[0]
+                self.output = self.interpreter.get_output_details()[0]
+            self.interpreter.set_tensor(self.input["index"], self._quantize(batch))
+            self.interpreter.invoke()
+            return self._dequantize(self.interpreter.get_tensor(self.output["index"]))
+
+
+def load_backend(name=BACKEND, keras_path=KERAS_PATH):
+    if name == "keras":
+        return KerasBackend(keras_path)
+    if name in TFLITE_SUFFIXES:
+        return TFLiteBackend(name, tflite_path(keras_path, name))
+    if name == "cascade":
+        # Cheap model first, `keras_path` (DenseNet201) only for uncertain images
+        import cascade
+        fast = load_backend(cascade.FAST_BACKEND, cascade.FAST_MODEL)
+        return cascade.CascadeBackend(fast, KerasBackend(keras_path))
+    raise ValueError(f"Unknown inference backend {name!r}, expected keras, cascade or one of {sorted(TFLITE_SUFFIXES)}")
@@ -0,0 +1,211 @@
+"""HTTP inference service: one warm model shared by every client, with micro-batching.
+
+    uvicorn inference_service:app --host 0.0.0.0 --port 8000
+
+    POST /predict        raw image bytes              -> {"predicted_class", "waste_type", ...}
+    POST /predict/batch  {"images": [base64, ...]}    -> {"results": [...]}
+    GET  /health                                      -> batching and cache stats
+    GET  /metrics, /metrics.json                      -> per-stage latency (SWM_PROFILING=1)
+
+Concurrent requests are queued and merged into one forward pass of up to
+MAX_BATCH_SIZE images, waiting at most MAX_WAIT_MS for a batch to fill up.
+Images seen before are answered from the prediction cache without a forward pass.
+"""
+import asyncio
+import base64
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+import model_registry
+import profiling
+import prediction_cache
+from predictor import describe, preprocess
+
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "32"))
+MAX_WAIT_MS = float(os.environ.get("MAX_WAIT_MS", "5"))
+
+# Image decoding runs here so it doesn't block the event loop
+decode_pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+
+class MicroBatcher:
+    def __init__(self, model, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.images = 0
+        # One forward pass at a time per model copy: with a single in-process
+        # model passes never overlap, and requests that arrive during one are
+        # picked up together by the next. A worker pool runs one per worker
+        self.concurrency = len(getattr(model, "workers", [None]))
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+    async def predict(self, array):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((array, future))
+        return await future
+
+    async def _next_batch(self):
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        slots = asyncio.Semaphore(self.concurrency)
+        while True:
+            await slots.acquire()
+            batch = await self._next_batch()
+            task = asyncio.create_task(self._predict(batch))
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _predict(self, batch):
+        loop = asyncio.get_running_loop()
+        x = np.stack([array for array, _ in batch])
+        try:
+            start = loop.time()
+            probs = await loop.run_in_executor(self._executor, self.model.predict, x)
+            if profiling.ENABLED:
+                profiling.record("batch_predict", loop.time() - start)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.images += len(batch)
+        for (_, future), p in zip(batch, probs):
+            if not future.done():
+                future.set_result(p)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "images": self.images,
+            "mean_batch_size": self.images / self.batches if self.batches else 0.0,
+            "queue_depth": self.queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "concurrent_batches": self.concurrency,
+        }
+
+
+def decode(raw):
+    img = Image.open(io.BytesIO(raw))
+    return img, preprocess(img)
+
+
+def response(entry):
+    probs = entry["probabilities"]
+    return {
+        "predicted_class": entry["predicted_class"],
+        "waste_type": entry["waste_type"],
+        "disposal_method": entry["disposal_method"],
+        "confidence": float(np.max(probs)) if probs is not None else None,
+        "probabilities": probs.tolist() if probs is not None else None,
+    }
+
+
+batcher = None
+
+
+async def classify(raw):
+    loop = asyncio.get_running_loop()
+    cache = prediction_cache.get_cache()
+    img = array = None
+    if cache.perceptual:
+        # Near-duplicate lookups need the decoded image
+        img, array = await loop.run_in_executor(decode_pool, decode, raw)
+    entry = await loop.run_in_executor(decode_pool, cache.get, raw, img)
+    if entry is None:
+        if array is None:
+            img, array = await loop.run_in_executor(decode_pool, decode, raw)
+        probs = await batcher.predict(array)
+        entry = await loop.run_in_executor(decode_pool, cache.put, raw, describe(probs), probs, img)
+    return response(entry)
+
+
+async def read_body(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        body.extend(message.get("body", b""))
+        if not message.get("more_body", False):
+            return bytes(body)
+
+
+async def send_json(send, status, payload):
+    body = json.dumps(payload).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def lifespan(receive, send):
+    global batcher
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            model = await asyncio.get_running_loop().run_in_executor(None, model_registry.get_backend)
+            batcher = MicroBatcher(model)
+            batcher.start()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            batcher.task.cancel()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+
+    method, path = scope["method"], scope["path"]
+    try:
+        if method == "POST" and path == "/predict":
+            return await send_json(send, 200, await classify(await read_body(receive)))
+        if method == "POST" and path == "/predict/batch":
+            images = json.loads(await read_body(receive))["images"]
+            results = await asyncio.gather(*(classify(base64.b64decode(b)) for b in images))
+            return await send_json(send, 200, {"results": list(results)})
+        if method == "GET" and path == "/health":
+            health = {"status": "ok", **batcher.stats(), "cache": prediction_cache.get_cache().stats()}
+            if hasattr(batcher.model, "stats"):
+                # e.g. the cascade's per-stage hit rates
+                health["backend"] = batcher.model.stats()
+            return await send_json(send, 200, health)
+        if method == "GET" and path == "/metrics.json":
+            return await send_json(send, 200, profiling.summary())
+        if method == "GET" and path == "/metrics":
+            body = profiling.export_prometheus().encode()
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/plain; version=0.0.4")],
+            })
+            return await send({"type": "http.response.body", "body": body})
+        return await send_json(send, 404, {"error": f"{method} {path} not found"})
+    except (ValueError, KeyError, OSError) as e:
+        # Bad JSON, missing "images" or an unreadable image
+        return await send_json(send, 400, {"error": str(e)})
@@ -0,0 +1,23 @@
+"""Write smaller WebP copies of the background for narrower screens.
+
+    python make_bg_variants.py
+
+assets.py picks up any variant that exists and serves it through a CSS media
+query, so phones don't download the full-size background.
+"""
+import os
+
+from PIL import Image
+
+from assets import BACKGROUND, STATIC_DIR, VARIANT_WIDTHS, variant_name
+
+if __name__ == "__main__":
+    # Reading the AVIF source needs Pillow >= 11.2 (see requirements.txt)
+    source = Image.open(os.path.join(STATIC_DIR, BACKGROUND)).convert("RGB")
+    for width in VARIANT_WIDTHS:
+        if width >= source.width:
+            continue
+        height = round(source.height * width / source.width)
+        path = os.path.join(STATIC_DIR, variant_name(width))
+        source.resize((width, height), Image.LANCZOS).save(path, "WEBP", quality=75, method=6)
+        print(f"Wrote {path} ({os.path.getsize(path) / 1024:.0f} KB)")
@@ -0,0 +1,127 @@
+import threading
+import time
+
+import numpy as np
+
+import artifacts
+import inference_backends
+import worker_pool
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Streamlit re-executes app.py on every interaction, but imported modules stay
+# in sys.modules. Keeping the models here means they are loaded once per
+# process and the same instance is handed to every session and every rerun.
+_lock = threading.Lock()
+_models = {}
+
+_preload_lock = threading.Lock()
+_preloading = set()
+
+# Load/warmup timings per model, so we can check reruns stay cheap
+stats = {}
+
+INPUT_SHAPE = (224, 224, 3)
+
+
+def _rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _load(key, loader, warmup):
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    model = loader()
+    load_seconds = time.perf_counter() - start
+
+    # The first forward pass builds the graph and allocates buffers, do it now
+    # instead of on the first user's "Predict" click
+    warmup_seconds = 0.0
+    if warmup:
+        start = time.perf_counter()
+        model.predict(np.zeros((1,) + INPUT_SHAPE, dtype=np.float32))
+        warmup_seconds = time.perf_counter() - start
+
+    rss_after = _rss_mb()
+    stats[key] = {
+        "load_seconds": round(load_seconds, 3),
+        "warmup_seconds": round(warmup_seconds, 3),
+        "loaded_at": time.time(),
+        "rss_mb_before": rss_before,
+        "rss_mb_after": rss_after,
+        "hits": 0,
+    }
+    print(f"Loaded {key} in {load_seconds:.2f}s (warmup {warmup_seconds:.2f}s)")
+    return model
+
+
+def _get(key, loader, warmup=True):
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            # Another session may have finished loading while we waited
+            model = _models.get(key)
+            if model is None:
+                model = _load(key, loader, warmup)
+                _models[key] = model
+                return model
+    stats[key]["hits"] += 1
+    return model
+
+
+def get_backend(name=inference_backends.BACKEND, keras_path=inference_backends.KERAS_PATH, warmup=True):
+    """The inference backend (keras, tflite-fp16, tflite-int8) shared by all sessions."""
+    return _get(f"{name}:{keras_path}", lambda: _load_backend(name, keras_path), warmup)
+
+
+def _load_backend(name, keras_path):
+    if worker_pool.WORKERS:
+        # Resolve (and maybe download) once here, not in every worker
+        return worker_pool.WorkerPool(name, artifacts.resolve(keras_path))
+    return inference_backends.load_backend(name, keras_path)
+
+
+def preload(name=inference_backends.BACKEND, keras_path=inference_backends.KERAS_PATH, warmup=True):
+    """Start loading a backend in a daemon thread, once per process.
+
+    get_backend() for the same model then waits for this load instead of
+    starting its own, so callers can preload early and block only when needed.
+    """
+    key = f"{name}:{keras_path}"
+    with _preload_lock:
+        if key in _models or key in _preloading:
+            return
+        _preloading.add(key)
+
+    def run():
+        try:
+            get_backend(name, keras_path, warmup)
+        except Exception as e:
+            # get_backend() retries in the caller's thread and surfaces the error there
+            print(f"Background load of {key} failed: {e}")
+        finally:
+            with _preload_lock:
+                _preloading.discard(key)
+
+    threading.Thread(target=run, name=f"preload-{key}", daemon=True).start()
+
+
+def get_model(path=inference_backends.KERAS_PATH, warmup=True):
+    """The Keras backend for `path`, its `.model` is the raw tf.keras model."""
+    return get_backend("keras", path, warmup)
+
+
+def is_loaded(name=inference_backends.BACKEND, keras_path=inference_backends.KERAS_PATH):
+    return f"{name}:{keras_path}" in _models
+
+
+def clear():
+    with _lock:
+        _models.clear()
+        stats.clear()
@@ -0,0 +1,50 @@
+import time
+
+import pandas as pd
+import streamlit as st
+
+import analytics
+
+st.set_page_config(page_title="Smart Waste Analytics", layout="wide")
+
+st.title("📊 Waste Analytics")
+st.write("Prediction volume per waste category and share of disposal outcomes over time.")
+
+# Only the hourly/daily rollup tables are read here, never the raw event log
+period = st.radio("Granularity", ["day", "hour"], horizontal=True)
+days = st.slider("Days to show", 1, 90, 30 if period == "day" else 2)
+rows = analytics.rollups(period, since=time.time() - days * analytics.DAY)
+
+if not rows:
+    st.info("No predictions have been logged yet.")
+    st.stop()
+
+df = pd.DataFrame(rows, columns=["bucket", "waste_type", "disposal_method", "predictions",
+                                 "confidence_sum", "confidence_count"])
+df["time"] = pd.to_datetime(df["bucket"], unit="s")
+
+total = int(df["predictions"].sum())
+col1, col2, col3 = st.columns(3)
+col1.metric("Predictions", f"{total:,}")
+col2.metric("Categories seen", df["waste_type"].nunique())
+col3.metric("Mean confidence", f"{df['confidence_sum'].sum() / max(df['confidence_count'].sum(), 1):.1%}")
+
+st.subheader("Volume per category")
+per_category = df.groupby("waste_type")["predictions"].sum().sort_values(ascending=False)
+st.bar_chart(per_category)
+st.line_chart(df.pivot_table(index="time", columns="waste_type", values="predictions", aggfunc="sum", fill_value=0))
+
+st.subheader("Share of disposal outcomes")
+outcomes = df.pivot_table(index="time", columns="disposal_method", values="predictions", aggfunc="sum", fill_value=0)
+st.area_chart(outcomes.div(outcomes.sum(axis=1), axis=0))
+
+st.subheader("Per category")
+summary = df.groupby(["waste_type", "disposal_method"]).agg(
+    predictions=("predictions", "sum"),
+    confidence_sum=("confidence_sum", "sum"),
+    confidence_count=("confidence_count", "sum"),
+)
+summary["mean_confidence"] = summary["confidence_sum"] / summary["confidence_count"].clip(lower=1)
+st.dataframe(
+    summary.drop(columns=["confidence_sum", "confidence_count"]).sort_values("predictions", ascending=False)
+)
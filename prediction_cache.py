@@ -0,0 +1,166 @@
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+import db
+from cache_utils import LRUCache
+
+# PREDICTION_CACHE_PERCEPTUAL=1 also matches re-encoded or resized copies of an
+# image whose perceptual hashes differ in at most MAX_DISTANCE of 64 bits
+PERCEPTUAL = os.environ.get("PREDICTION_CACHE_PERCEPTUAL", "0") == "1"
+MAX_DISTANCE = 4
+_MASK64 = (1 << 64) - 1
+MEMORY_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "1024"))
+
+
+def content_hash(raw):
+    return hashlib.sha256(raw).hexdigest()
+
+
+def perceptual_hash(img):
+    """64-bit difference hash: is each pixel brighter than its right neighbour."""
+    pixels = np.asarray(img.convert("L").resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    value = int.from_bytes(np.packbits(bits).tobytes(), "big")
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class PredictionCache:
+    def __init__(self, maxsize=MEMORY_SIZE, perceptual=PERCEPTUAL, max_distance=MAX_DISTANCE):
+        self.memory = LRUCache(maxsize)
+        self.perceptual = perceptual
+        self.max_distance = max_distance
+        self.counters = {"memory_hits": 0, "db_hits": 0, "perceptual_hits": 0, "misses": 0}
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS prediction_cache (
+                content_hash TEXT PRIMARY KEY,
+                phash INTEGER,
+                predicted_class TEXT,
+                waste_type TEXT,
+                disposal_method TEXT,
+                probabilities BLOB,
+                created_at REAL
+            )
+        """)
+        db.execute("CREATE INDEX IF NOT EXISTS idx_prediction_cache_phash ON prediction_cache (phash)")
+        # Added for the similar-items index, older caches get the column here
+        columns = [row[1] for row in db.query("PRAGMA table_info(prediction_cache)")]
+        if "embedding" not in columns:
+            db.execute("ALTER TABLE prediction_cache ADD COLUMN embedding BLOB")
+
+    def _from_row(self, row):
+        return {
+            "content_hash": row[0],
+            "phash": row[1],
+            "predicted_class": row[2],
+            "waste_type": row[3],
+            "disposal_method": row[4],
+            "probabilities": np.frombuffer(row[5], dtype=np.float32) if row[5] is not None else None,
+            "embedding": np.frombuffer(row[6], dtype=np.float32) if row[6] is not None else None,
+        }
+
+    def _query(self, where, args):
+        row = db.query_one(
+            "SELECT content_hash, phash, predicted_class, waste_type, disposal_method, probabilities, embedding "
+            f"FROM prediction_cache WHERE {where} LIMIT 1", args
+        )
+        return self._from_row(row) if row else None
+
+    def _nearest(self, phash):
+        # Linear scan of the in-memory entries, bounded by maxsize
+        best, best_distance = None, self.max_distance + 1
+        for _, entry in self.memory.items():
+            if entry["phash"] is not None:
+                # Hashes are stored as signed 64-bit, mask back to unsigned so the sign bit counts like any other
+                distance = ((entry["phash"] ^ phash) & _MASK64).bit_count()
+                if distance < best_distance:
+                    best, best_distance = entry, distance
+        return best
+
+    def get(self, raw, img=None):
+        return self.get_by_hash(content_hash(raw), img)
+
+    def get_by_hash(self, key, img=None):
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.counters["memory_hits"] += 1
+            return entry
+
+        entry = self._query("content_hash = ?", (key,))
+        if entry is not None:
+            self.counters["db_hits"] += 1
+            self.memory.put(key, entry)
+            return entry
+
+        if self.perceptual and img is not None:
+            phash = perceptual_hash(img)
+            entry = self._nearest(phash) or self._query("phash = ?", (phash,))
+            if entry is not None:
+                self.counters["perceptual_hits"] += 1
+                self.memory.put(key, entry)
+                return entry
+
+        self.counters["misses"] += 1
+        return None
+
+    def put(self, raw, result, probabilities=None, img=None, embedding=None):
+        return self.put_by_hash(content_hash(raw), result, probabilities, img, embedding)
+
+    def put_by_hash(self, key, result, probabilities=None, img=None, embedding=None):
+        phash = perceptual_hash(img) if self.perceptual and img is not None else None
+        if probabilities is not None:
+            probabilities = np.asarray(probabilities, dtype=np.float32)
+        if embedding is not None:
+            embedding = np.asarray(embedding, dtype=np.float32)
+        entry = {
+            "content_hash": key,
+            "phash": phash,
+            "predicted_class": result["predicted_class"],
+            "waste_type": result["waste_type"],
+            "disposal_method": result["disposal_method"],
+            "probabilities": probabilities,
+            "embedding": embedding,
+        }
+        self.memory.put(key, entry)
+        db.execute(
+            "INSERT OR REPLACE INTO prediction_cache "
+            "(content_hash, phash, predicted_class, waste_type, disposal_method, probabilities, created_at, embedding) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, phash, entry["predicted_class"], entry["waste_type"], entry["disposal_method"],
+             probabilities.tobytes() if probabilities is not None else None, time.time(),
+             embedding.tobytes() if embedding is not None else None),
+        )
+        return entry
+
+    def clear(self):
+        """Forget every cached prediction, e.g. after the model's weights changed."""
+        self.memory.clear()
+        db.execute("DELETE FROM prediction_cache")
+
+    def stats(self):
+        hits = self.counters["memory_hits"] + self.counters["db_hits"] + self.counters["perceptual_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_size": self.memory.maxsize,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PredictionCache()
+    return _cache
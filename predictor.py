@@ -0,0 +1,59 @@
+import numpy as np
+
+import profiling
+from preprocessing import prepare, prepared_batch, single_batch, to_model_input
+from waste_data import class_names, lookup_category
+
+
+def preprocess(img):
+    return to_model_input(prepare(img))
+
+
+def describe(probs):
+    """Class, category, disposal method and confidence for one probability vector."""
+    predicted_class = class_names[int(np.argmax(probs))]
+    waste_type, disposal_method = lookup_category(predicted_class)
+    return {
+        "predicted_class": predicted_class,
+        "waste_type": waste_type,
+        "disposal_method": disposal_method,
+        "confidence": float(np.max(probs)),
+    }
+
+
+def predict(model, img):
+    """(describe() result, probability vector) for one PIL image."""
+    with profiling.stage("preprocess"):
+        batch = single_batch(img)
+    with profiling.stage("model_predict"):
+        probs = model.predict(batch)[0]
+    return describe(probs), probs
+
+
+def _predict_with_embedding(model, batch):
+    with profiling.stage("model_predict"):
+        if not hasattr(model, "predict_with_embeddings"):
+            probs = model.predict(batch)[0]
+            return describe(probs), probs, None
+        probs, embeddings = model.predict_with_embeddings(batch)
+    # A worker pool of a backend without embeddings returns None
+    return describe(probs[0]), probs[0], None if embeddings is None else embeddings[0]
+
+
+def predict_with_embedding(model, img):
+    """predict() plus the image's penultimate-layer embedding, None if the backend has none."""
+    with profiling.stage("preprocess"):
+        batch = single_batch(img)
+    return _predict_with_embedding(model, batch)
+
+
+def predict_prepared(model, array):
+    """predict_with_embedding() for a 224x224 uint8 array that is already prepare()d."""
+    with profiling.stage("preprocess"):
+        batch = prepared_batch(array)
+    return _predict_with_embedding(model, batch)
+
+
+def preprocess_and_predict(model, img):
+    result, _ = predict(model, img)
+    return result["predicted_class"], result["waste_type"], result["disposal_method"]
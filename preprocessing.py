@@ -0,0 +1,76 @@
+import threading
+
+import numpy as np
+from PIL import Image, ImageOps
+
+IMAGE_SIZE = (224, 224)
+_SCALE = np.float32(1.0 / 255)
+
+
+def to_rgb(img):
+    if img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info):
+        # Transparent areas become white instead of whatever colour is stored under them
+        rgba = img.convert("RGBA")
+        img = Image.new("RGB", rgba.size, (255, 255, 255))
+        img.paste(rgba, mask=rgba.getchannel("A"))
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    return img
+
+
+def prepare(img, size=IMAGE_SIZE):
+    """Orient, convert to RGB and resize a PIL image for the model.
+
+    For a JPEG that hasn't been decoded yet, draft() lets libjpeg decode at
+    1/2, 1/4 or 1/8 scale while staying at least `size`, so a 12 MP phone photo
+    is decoded at ~0.2 MP instead of in full.
+    """
+    if img.format == "JPEG":
+        img.draft("RGB", size)
+
+    img = to_rgb(ImageOps.exif_transpose(img))
+
+    # reducing_gap shrinks by an integer factor with reduce() before the
+    # final resample, which is much cheaper for large PNGs
+    return img.resize(size, reducing_gap=3.0)
+
+
+def load(source, size=IMAGE_SIZE):
+    """Open a path or file object and prepare() it."""
+    return prepare(Image.open(source), size)
+
+
+def to_model_input(img, out=None):
+    """Scale a prepared image to float32 [0, 1], written into `out` if given."""
+    if out is None:
+        out = np.empty(IMAGE_SIZE[::-1] + (3,), dtype=np.float32)
+    np.multiply(np.asarray(img, dtype=np.uint8), _SCALE, out=out)
+    return out
+
+
+_local = threading.local()
+
+
+def _buffer():
+    buffer = getattr(_local, "buffer", None)
+    if buffer is None:
+        buffer = _local.buffer = np.empty((1,) + IMAGE_SIZE[::-1] + (3,), dtype=np.float32)
+    return buffer
+
+
+def single_batch(img):
+    """A (1, 224, 224, 3) model input in a buffer reused by the calling thread.
+
+    The buffer is overwritten by the next call from the same thread, so copy it
+    if it has to outlive the forward pass.
+    """
+    buffer = _buffer()
+    to_model_input(prepare(img), out=buffer[0])
+    return buffer
+
+
+def prepared_batch(array):
+    """single_batch() for an image that is already prepare()d, e.g. kept as a uint8 array."""
+    buffer = _buffer()
+    to_model_input(array, out=buffer[0])
+    return buffer
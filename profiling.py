@@ -0,0 +1,202 @@
+"""Per-stage latency counters and histograms for the request path.
+
+    with profiling.stage("predict"):
+        ...
+
+Off unless SWM_PROFILING=1. While off, stage() hands back a shared no-op
+context manager, so instrumented code pays one function call and nothing else.
+Metrics can be exported in Prometheus text format or as JSON, and
+SWM_METRICS_PORT=9100 serves them at /metrics and /metrics.json.
+"""
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.environ.get("SWM_PROFILING", "0") == "1"
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Durations kept per stage for the p50/p95 panel
+RECENT = 500
+
+_NULL = contextlib.nullcontext()
+_lock = threading.Lock()
+_stages = {}
+_gauges = {}
+
+
+def _process_start():
+    # Linux: start time in clock ticks after boot, so interpreter and streamlit
+    # startup are included. Elsewhere, fall back to when this module was imported
+    try:
+        with open("/proc/self/stat") as f:
+            ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat") as f:
+            boot = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return boot + ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return time.time()
+
+
+PROCESS_START = _process_start()
+_first_paint = None
+
+
+class _Stage:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.recent = deque(maxlen=RECENT)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.recent.append(seconds)
+
+
+def record(name, seconds):
+    with _lock:
+        stats = _stages.get(name)
+        if stats is None:
+            stats = _stages[name] = _Stage()
+        stats.add(seconds)
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def stage(name):
+    if not ENABLED:
+        return _NULL
+    return _Timer(name)
+
+
+def mark_first_paint():
+    """Record how long after process start the first page was rendered, once."""
+    global _first_paint
+    if _first_paint is not None:
+        return _first_paint
+    with _lock:
+        if _first_paint is not None:
+            return _first_paint
+        _first_paint = time.time() - PROCESS_START
+    # Always recorded and logged: it happens once per process and is the number
+    # deploys care about
+    record("cold_start_first_paint", _first_paint)
+    print(f"Cold start: first page rendered {_first_paint:.2f}s after process start")
+    return _first_paint
+
+
+def gauge(name, help, callback, label=None):
+    """Export `callback()` as the Prometheus gauge swm_<name>.
+
+    The callback returns a number, or a {label value: number} dict with `label`
+    as the label name. It runs on every export, from the exporting thread.
+    """
+    with _lock:
+        _gauges[name] = (help, label, callback)
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def summary():
+    """{stage: {count, mean, p50, p95}} in seconds, p50/p95 over recent calls."""
+    with _lock:
+        snapshot = {name: (s.count, s.total, list(s.recent)) for name, s in _stages.items()}
+    return {
+        name: {
+            "count": count,
+            "mean": total / count if count else 0.0,
+            "p50": _percentile(recent, 0.50),
+            "p95": _percentile(recent, 0.95),
+        }
+        for name, (count, total, recent) in sorted(snapshot.items())
+    }
+
+
+def export_json():
+    return json.dumps(summary(), indent=2)
+
+
+def export_prometheus():
+    lines = [
+        "# HELP swm_stage_seconds Time spent per request stage.",
+        "# TYPE swm_stage_seconds histogram",
+    ]
+    with _lock:
+        for name, s in sorted(_stages.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS + (float("inf"),), s.buckets):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'swm_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'swm_stage_seconds_sum{{stage="{name}"}} {s.total}')
+            lines.append(f'swm_stage_seconds_count{{stage="{name}"}} {s.count}')
+        gauges = sorted(_gauges.items())
+    # Outside the lock: callbacks take their own locks
+    for name, (help, label, callback) in gauges:
+        lines.append(f"# HELP swm_{name} {help}")
+        lines.append(f"# TYPE swm_{name} gauge")
+        value = callback()
+        if isinstance(value, dict):
+            lines.extend(f'swm_{name}{{{label}="{key}"}} {v}' for key, v in value.items())
+        else:
+            lines.append(f"swm_{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = export_prometheus(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = export_json(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        body = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+
+
+def start_metrics_server(port=None):
+    """Serve /metrics and /metrics.json from a daemon thread, once per process."""
+    global _server
+    port = port or os.environ.get("SWM_METRICS_PORT")
+    if _server is not None or not port or not ENABLED:
+        return
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
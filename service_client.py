@@ -0,0 +1,30 @@
+import base64
+import os
+
+import requests
+
+# When set, the Streamlit app sends images to inference_service.py instead of
+# loading the model itself, e.g. INFERENCE_SERVICE_URL=http://localhost:8000
+INFERENCE_SERVICE_URL = os.environ.get("INFERENCE_SERVICE_URL")
+
+
+class InferenceClient:
+    def __init__(self, url=INFERENCE_SERVICE_URL, timeout=30):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def predict(self, image_bytes):
+        response = self.session.post(f"{self.url}/predict", data=image_bytes, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def predict_batch(self, images):
+        payload = {"images": [base64.b64encode(raw).decode() for raw in images]}
+        response = self.session.post(f"{self.url}/predict/batch", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()["results"]
+
+
+def get_client():
+    return InferenceClient() if INFERENCE_SERVICE_URL else None
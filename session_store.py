@@ -0,0 +1,157 @@
+"""Compact per-session upload state, held in one process-wide store.
+
+A session's st.session_state only keeps its key into this store, plus the
+predicted class names. The record behind the key is what the page needs
+between reruns: the upload's content hash, a JPEG display thumbnail, the
+224x224 uint8 model input and the prediction's confidence, embedding and
+similar items. The raw bytes and the full-resolution decode are dropped as
+soon as the record is built, so a record is ~0.3 MB whatever the photo size.
+Records of sessions idle for SESSION_IDLE_SECONDS are evicted, and at most
+MAX_SESSIONS are kept, least recently seen first out.
+"""
+import io
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+from PIL import Image, ImageOps
+
+import profiling
+from cache_utils import LRUCache
+from prediction_cache import content_hash
+from preprocessing import load, to_rgb
+
+IDLE_SECONDS = float(os.environ.get("SESSION_IDLE_SECONDS", "1800"))
+MAX_SESSIONS = int(os.environ.get("MAX_SESSIONS", "1000"))
+# Idle sessions are looked for at most this often
+SWEEP_INTERVAL = 60
+DISPLAY_SIZE = (640, 640)
+DISPLAY_QUALITY = 85
+
+
+def new_key():
+    return uuid.uuid4().hex
+
+
+def thumbnail(raw, size=DISPLAY_SIZE):
+    """JPEG bytes of the upload, oriented and shrunk to fit in `size`."""
+    img = Image.open(io.BytesIO(raw))
+    if img.format == "JPEG":
+        img.draft("RGB", size)
+    # Alpha flattened onto white, like the model input
+    img = to_rgb(ImageOps.exif_transpose(img))
+    img.thumbnail(size, reducing_gap=3.0)
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=DISPLAY_QUALITY)
+    return out.getvalue()
+
+
+def make_record(raw, upload_id):
+    return {
+        "upload_id": upload_id,
+        "content_hash": content_hash(raw),
+        "thumbnail": thumbnail(raw),
+        # Same decode and resize as the prediction path, kept as uint8 (4x smaller than the float input)
+        "model_input": np.asarray(load(io.BytesIO(raw)), dtype=np.uint8),
+        "confidence": None,
+        "embedding": None,
+        "similar": None,
+        "last_seen": time.time(),
+    }
+
+
+def model_input_png(record):
+    """The model input as PNG bytes, for backends that take an encoded image."""
+    out = io.BytesIO()
+    Image.fromarray(record["model_input"]).save(out, "PNG")
+    return out.getvalue()
+
+
+def record_bytes(record):
+    """Approximate memory held by a record's images and arrays."""
+    size = len(record["thumbnail"]) + record["model_input"].nbytes
+    if record["embedding"] is not None:
+        size += record["embedding"].nbytes
+    if record["similar"]:
+        size += sum(item["thumbnail"].nbytes for item in record["similar"]["neighbours"]
+                    if item["thumbnail"] is not None)
+    return size
+
+
+class SessionStore:
+    def __init__(self, max_sessions=MAX_SESSIONS, idle_seconds=IDLE_SECONDS):
+        self.records = LRUCache(max_sessions)
+        self.idle_seconds = idle_seconds
+        self.evicted = {"idle": 0, "capacity": 0}
+        self._last_sweep = time.time()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        record = self.records.get(key)
+        if record is not None:
+            record["last_seen"] = time.time()
+        return record
+
+    def put(self, key, record):
+        with self._lock:
+            if key not in self.records and len(self.records) >= self.records.maxsize:
+                self.evicted["capacity"] += 1
+            self.records.put(key, record)
+
+    def drop(self, key):
+        self.records.pop(key)
+
+    def evict_idle(self, now=None):
+        """Drop records not seen for idle_seconds, at most once per SWEEP_INTERVAL."""
+        now = now or time.time()
+        with self._lock:
+            if now - self._last_sweep < SWEEP_INTERVAL:
+                return 0
+            self._last_sweep = now
+        # Least recently used first, so the sweep stops at the first active session
+        evicted = 0
+        for key, record in self.records.items():
+            if now - record["last_seen"] < self.idle_seconds:
+                break
+            self.records.pop(key)
+            evicted += 1
+        with self._lock:
+            self.evicted["idle"] += evicted
+        return evicted
+
+    def session_bytes(self):
+        """{key prefix: bytes} per stored session."""
+        return {key[:8]: record_bytes(record) for key, record in self.records.items()}
+
+    def stats(self):
+        sizes = list(self.session_bytes().values())
+        return {
+            "sessions": len(sizes),
+            "max_sessions": self.records.maxsize,
+            "total_bytes": sum(sizes),
+            "max_session_bytes": max(sizes, default=0),
+            "mean_session_bytes": sum(sizes) / len(sizes) if sizes else 0,
+            "idle_seconds": self.idle_seconds,
+            "evicted_idle": self.evicted["idle"],
+            "evicted_capacity": self.evicted["capacity"],
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SessionStore()
+                profiling.gauge("sessions", "Sessions with a stored upload.", lambda: len(_store.records))
+                profiling.gauge("session_bytes_total", "Memory held by all session records.",
+                                lambda: _store.stats()["total_bytes"])
+                profiling.gauge("session_bytes", "Memory held per session record.", _store.session_bytes,
+                                label="session")
+    return _store
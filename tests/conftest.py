@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# The app's modules live at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """A fresh SQLite database for db and the modules that keep schema state on top of it."""
+    import accounts
+    import db
+
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setattr(db, "_conn", None)
+    monkeypatch.setattr(accounts, "_schema_ready", False)
+    monkeypatch.setattr(accounts, "_writer", None)
+    yield db
+    if db._conn is not None:
+        db._conn.close()
@@ -0,0 +1,33 @@
+import pytest
+
+import accounts
+
+
+def test_award_is_visible_before_and_after_the_write(temp_db):
+    user = accounts.login("alice")
+    writer = accounts.get_writer()
+    writer.award(user, 10, "disposal")
+    assert accounts.get_points(user) == 10
+    writer.flush()
+    assert accounts.get_points(user) == 10
+    assert writer.pending == {}
+
+
+def test_failed_batch_is_rolled_back_and_not_pending(temp_db):
+    user = accounts.login("alice")
+    writer = accounts.get_writer()
+    temp_db.execute(
+        "CREATE TRIGGER fail_totals BEFORE INSERT ON user_totals WHEN NEW.points = 10 "
+        "BEGIN SELECT RAISE(ABORT, 'database is locked'); END"
+    )
+    writer.award(user, 10, "disposal")
+    with pytest.raises(Exception, match="locked"):
+        writer.flush()
+    temp_db.execute("DROP TRIGGER fail_totals")
+
+    writer.award(user, 5, "disposal")
+    writer.flush()
+    # The ledger insert of the failed batch must not ride on the next commit
+    assert temp_db.query_one("SELECT SUM(points) FROM points_ledger")[0] == 5
+    assert accounts.get_points(user) == 5
+    assert writer.pending == {}
@@ -0,0 +1,81 @@
+import csv
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import bulk_classify
+import model_registry
+from waste_data import class_names
+
+
+class CountingModel:
+    """Predicts class i for an image whose red channel is i, fails after `fail_after` batches."""
+
+    def __init__(self, fail_after=None):
+        self.batches = 0
+        self.fail_after = fail_after
+
+    def predict(self, batch):
+        if self.fail_after is not None and self.batches >= self.fail_after:
+            raise KeyboardInterrupt
+        self.batches += 1
+        classes = np.rint(batch[:, 0, 0, 0] * 255).astype(int) % len(class_names)
+        return np.eye(len(class_names), dtype=np.float32)[classes]
+
+
+def make_images(directory, count):
+    directory.mkdir()
+    for i in range(count):
+        out = io.BytesIO()
+        Image.new("RGB", (40, 30), (i, 0, 0)).save(out, "PNG")
+        (directory / f"{i:03d}.png").write_bytes(out.getvalue())
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def classify(source, out, model, monkeypatch, **kwargs):
+    monkeypatch.setattr(model_registry, "get_backend", lambda *args: model)
+    return bulk_classify.run(str(source), str(out), batch_size=4, workers=1, checkpoint_every=4, **kwargs)
+
+
+def test_resume_after_interruption_classifies_every_file_once(tmp_path, monkeypatch):
+    source, out = tmp_path / "photos", tmp_path / "results.csv"
+    make_images(source, 10)
+    with pytest.raises(KeyboardInterrupt):
+        classify(source, out, CountingModel(fail_after=2), monkeypatch)
+    assert len(read_rows(out)) == 8
+
+    # A row cut off after the last checkpoint is dropped and redone
+    with open(out, "a", encoding="utf-8") as f:
+        f.write("008.png,half a ro")
+    model = CountingModel()
+    result = classify(source, out, model, monkeypatch)
+    assert result == {**result, "classified": 2, "total": 10}
+    assert model.batches == 1
+
+    rows = read_rows(out)
+    assert sorted(row["file"] for row in rows) == [f"{i:03d}.png" for i in range(10)]
+    assert all(row["predicted_class"] == class_names[int(row["file"][:3])] for row in rows)
+
+
+def test_restart_discards_earlier_results(tmp_path, monkeypatch):
+    source, out = tmp_path / "photos", tmp_path / "results.csv"
+    make_images(source, 5)
+    classify(source, out, CountingModel(), monkeypatch)
+    result = classify(source, out, CountingModel(), monkeypatch, restart=True)
+    assert result["classified"] == 5
+    assert len(read_rows(out)) == 5
+
+
+def test_output_from_another_source_is_refused(tmp_path, monkeypatch):
+    make_images(tmp_path / "a", 2)
+    make_images(tmp_path / "b", 2)
+    out = tmp_path / "results.csv"
+    classify(tmp_path / "a", out, CountingModel(), monkeypatch)
+    with pytest.raises(SystemExit):
+        classify(tmp_path / "b", out, CountingModel(), monkeypatch)
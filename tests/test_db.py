@@ -0,0 +1,34 @@
+def add(db, ideas):
+    db.executemany("INSERT INTO community_ideas (user_name, idea, created_at) VALUES (?, ?, ?)", ideas)
+
+
+def all_pages(db, limit):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = db.recent_ideas(limit, before=cursor)
+        pages.append(rows)
+        if cursor is None:
+            return pages
+
+
+def test_recent_ideas_pages_cover_every_idea_once(temp_db):
+    # Several ideas share a timestamp, the id breaks the tie
+    add(temp_db, [("user", f"idea {i}", float(i // 3)) for i in range(10)])
+    pages = all_pages(temp_db, 4)
+    assert [len(page) for page in pages] == [4, 4, 2]
+    rows = [row for page in pages for row in page]
+    assert [row[2] for row in rows] == [f"idea {i}" for i in reversed(range(10))]
+
+
+def test_recent_ideas_exact_multiple_ends_with_empty_page(temp_db):
+    add(temp_db, [("user", f"idea {i}", float(i)) for i in range(4)])
+    pages = all_pages(temp_db, 2)
+    assert [len(page) for page in pages] == [2, 2, 0]
+
+
+def test_recent_ideas_cursor_is_stable_when_ideas_are_added(temp_db):
+    add(temp_db, [("user", f"idea {i}", float(i)) for i in range(6)])
+    first, cursor = temp_db.recent_ideas(3)
+    add(temp_db, [("user", "newer idea", 100.0)])
+    second, _ = temp_db.recent_ideas(3, before=cursor)
+    assert [row[2] for row in second] == ["idea 2", "idea 1", "idea 0"]
@@ -0,0 +1,75 @@
+import os
+import shutil
+
+import pytest
+
+from training import manifest
+
+pytest.importorskip("sklearn")
+
+CLASSES = ("cans", "glass")
+
+
+def make_dataset(root, per_class=10):
+    dataset = root / "images" / "images"
+    for class_name in CLASSES:
+        directory = dataset / class_name / "default"
+        directory.mkdir(parents=True)
+        for i in range(per_class):
+            (directory / f"img_{i:02d}.jpg").write_bytes(f"{class_name} {i}".encode())
+    return dataset
+
+
+def touch_dir(path):
+    # Adding a file bumps the folder mtime, but maybe not past its resolution within a test
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def splits(conn):
+    return dict(conn.execute("SELECT path, split FROM images"))
+
+
+def test_first_build_splits_every_file(tmp_path):
+    conn, stats = manifest.update(str(make_dataset(tmp_path)))
+    assert stats["assigned"] == 20
+    assert set(splits(conn).values()) == set(manifest.SPLITS)
+    conn.close()
+
+
+def test_splits_stay_put_when_files_are_added(tmp_path):
+    dataset = make_dataset(tmp_path)
+    conn, _ = manifest.update(str(dataset))
+    before = splits(conn)
+    conn.close()
+
+    directory = dataset / "cans" / "default"
+    (directory / "img_99.jpg").write_bytes(b"a new can")
+    touch_dir(directory)
+    conn, stats = manifest.update(str(dataset))
+    after = splits(conn)
+    conn.close()
+    assert stats["rescanned"] == 1 and stats["assigned"] == 1
+    assert {path: after[path] for path in before} == before
+    assert after[str(directory / "img_99.jpg")] in manifest.SPLITS
+
+
+def test_copy_sorting_first_does_not_replace_the_original(tmp_path):
+    dataset = make_dataset(tmp_path)
+    conn, _ = manifest.update(str(dataset))
+    before = splits(conn)
+    conn.close()
+
+    directory = dataset / "cans" / "default"
+    original = str(directory / "img_05.jpg")
+    copy = str(directory / "a_copy.jpg")
+    shutil.copyfile(original, copy)
+    touch_dir(directory)
+    conn, _ = manifest.update(str(dataset))
+    after = splits(conn)
+    duplicate_of = dict(conn.execute("SELECT path, duplicate_of FROM images"))
+    conn.close()
+    assert duplicate_of[copy] == original
+    assert duplicate_of[original] is None
+    assert after[copy] is None
+    assert {path: after[path] for path in before} == before
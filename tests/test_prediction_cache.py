@@ -0,0 +1,42 @@
+import numpy as np
+from PIL import Image
+
+import prediction_cache
+from prediction_cache import PredictionCache, perceptual_hash
+
+RESULT = {"predicted_class": "glass_bottles", "waste_type": "Recyclable", "disposal_method": "Recycle bin"}
+
+
+def gradient(width=64, height=64):
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    pixels = np.tile(x, (height, 1)) + np.linspace(0, 40, height, dtype=np.float32)[:, None] * np.sin(x / 9)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).convert("RGB")
+
+
+def test_perceptual_hash_fits_signed_64_bits():
+    for img in (gradient(), gradient().transpose(Image.FLIP_LEFT_RIGHT), Image.new("RGB", (32, 32))):
+        assert -(1 << 63) <= perceptual_hash(img) < 1 << 63
+
+
+def test_perceptual_hash_survives_resizing():
+    img = gradient(256, 256)
+    distance = ((perceptual_hash(img) ^ perceptual_hash(img.resize((97, 97)))) & prediction_cache._MASK64).bit_count()
+    assert distance <= prediction_cache.MAX_DISTANCE
+
+
+def test_nearest_counts_the_sign_bit(temp_db):
+    cache = PredictionCache(perceptual=True)
+    cache.memory.put("negative", {**RESULT, "phash": -1})
+    # -1 and 0 differ in all 64 bits, not one
+    assert cache._nearest(0) is None
+    assert cache._nearest(-2)["phash"] == -1
+    assert cache._nearest(-1 ^ 0b1111)["phash"] == -1
+    assert cache._nearest(-1 ^ 0b11111) is None
+
+
+def test_perceptual_hit_for_resized_copy(temp_db):
+    cache = PredictionCache(perceptual=True)
+    img = gradient(256, 256)
+    cache.put(b"original", RESULT, img=img)
+    assert cache.get(b"resized copy", img.resize((120, 120)))["predicted_class"] == RESULT["predicted_class"]
+    assert cache.counters["perceptual_hits"] == 1
@@ -0,0 +1,48 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+import session_store
+from session_store import SWEEP_INTERVAL, SessionStore
+
+
+def png(color, size=(800, 600), mode="RGB"):
+    out = io.BytesIO()
+    Image.new(mode, size, color).save(out, "PNG")
+    return out.getvalue()
+
+
+def test_record_is_compact():
+    record = session_store.make_record(png("red", (3000, 2000)), "upload")
+    assert record["model_input"].shape == (224, 224, 3)
+    assert record["model_input"].dtype == np.uint8
+    assert max(Image.open(io.BytesIO(record["thumbnail"])).size) <= max(session_store.DISPLAY_SIZE)
+
+
+def test_transparent_upload_is_flattened_onto_white():
+    record = session_store.make_record(png((0, 0, 0, 0), mode="RGBA"), "upload")
+    assert record["model_input"].min() == 255
+    assert np.asarray(Image.open(io.BytesIO(record["thumbnail"]))).min() >= 250
+
+
+def test_capacity_evicts_least_recently_seen():
+    store = SessionStore(max_sessions=2)
+    for key in "abc":
+        store.put(key, {"last_seen": 0})
+        if key == "b":
+            store.get("a")
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.evicted["capacity"] == 1
+
+
+def test_idle_sessions_are_swept_at_most_once_per_interval():
+    store = SessionStore(idle_seconds=100)
+    start = store._last_sweep
+    store.put("idle", {"last_seen": start - 200})
+    store.put("active", {"last_seen": start})
+    assert store.evict_idle(now=start + 1) == 0
+    assert store.evict_idle(now=start + SWEEP_INTERVAL) == 1
+    assert store.get("idle") is None and store.get("active") is not None
+    assert store.evicted["idle"] == 1
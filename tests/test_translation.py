@@ -0,0 +1,48 @@
+import translation
+from translation import StubBackend, TranslationCache
+
+
+def test_misses_are_queued_and_flushed_in_one_call(temp_db):
+    cache = TranslationCache(StubBackend())
+    assert cache.translate("plastic bottle", "hi") == "plastic bottle"
+    assert cache.translate("tin can", "hi") == "tin can"
+    assert cache.flush() == 2
+    assert cache.backend.calls == 1
+    assert cache.translate("tin can", "hi") == "[hi] tin can"
+
+
+def test_translations_persist_across_caches(temp_db):
+    TranslationCache(StubBackend()).translate_many(["glass jar"], "fr")
+    backend = StubBackend()
+    assert TranslationCache(backend).translate_many(["glass jar"], "fr") == ["[fr] glass jar"]
+    assert backend.calls == 0
+
+
+class LineTranslator:
+    """Stands in for googletrans: one call per string, keeps newlines."""
+
+    def __init__(self, merge_lines=False):
+        self.requests = 0
+        self.merge_lines = merge_lines
+
+    def translate(self, text, dest):
+        self.requests += 1
+        lines = [text.replace("\n", " ")] if self.merge_lines else text.split("\n")
+        return type("Result", (), {"text": "\n".join(f"<{line}>" for line in lines)})()
+
+
+def test_google_backend_sends_one_request_per_chunk(monkeypatch):
+    monkeypatch.setattr(translation, "MAX_REQUEST_CHARS", 21)
+    backend = translation.GoogleBackend()
+    backend._translator = LineTranslator()
+    texts = ["one", "two\nlines", "three", "x" * 15, "four"]
+    assert backend.translate_many(texts, "hi") == ["<one>", "<two>\n<lines>", "<three>", "<" + "x" * 15 + ">", "<four>"]
+    # "two\nlines" alone, then ["one", "three"] and ["x" * 15, "four"]
+    assert backend._translator.requests == 3
+
+
+def test_google_backend_redoes_a_chunk_that_lost_its_lines():
+    backend = translation.GoogleBackend()
+    backend._translator = LineTranslator(merge_lines=True)
+    assert backend.translate_many(["a", "b"], "hi") == ["<a>", "<b>"]
+    assert backend._translator.requests == 3
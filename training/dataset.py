@@ -0,0 +1,75 @@
+import hashlib
+import os
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from preprocessing import load, to_model_input
+
+# Same layout and sizes as smart.ipynb:
+#   images/images/<class_name>/{default,real_world}/<image>
+DATASET_DIR = os.path.join("images", "images")
+IMG_SIZE = (224, 224)
+BATCH_SIZE = 32
+# Fixed so the train/valid/test split is the same on every run
+SEED = 42
+
+
+def build_img_dataset(dataset_dir=DATASET_DIR, split_ratio=(0.7, 0.2, 0.1), seed=SEED, use_manifest=True):
+    if use_manifest:
+        # Incremental index with stored splits, see training/manifest.py
+        from training import manifest
+        return manifest.load_dataset(dataset_dir, split_ratio, seed)
+
+    all_images = []
+    all_labels = []
+    class_names = sorted(os.listdir(dataset_dir))
+
+    for class_idx, class_name in enumerate(class_names):
+        class_path = os.path.join(dataset_dir, class_name)
+        if os.path.isdir(class_path):
+            for subfolder in ['default', 'real_world']:
+                subfolder_path = os.path.join(class_path, subfolder)
+                if os.path.exists(subfolder_path):
+                    for img_name in os.listdir(subfolder_path):
+                        img_path = os.path.join(subfolder_path, img_name)
+                        all_images.append(img_path)
+                        all_labels.append(class_idx)
+
+    print(f"Total images collected: {len(all_images)}")
+
+    # Check if dataset is empty
+    if len(all_images) == 0:
+        print("Error: No images found. Check dataset path and structure.")
+        return None, None, None, None, None, None, None
+
+    # Split dataset
+    X_train, X_temp, y_train, y_temp = train_test_split(
+        all_images, all_labels, test_size=1 - split_ratio[0], stratify=all_labels, random_state=seed
+    )
+    X_valid, X_test, y_valid, y_test = train_test_split(
+        X_temp, y_temp, test_size=split_ratio[2] / (split_ratio[1] + split_ratio[2]), stratify=y_temp,
+        random_state=seed
+    )
+
+    return X_train, y_train, X_valid, y_valid, X_test, y_test, class_names
+
+
+def fingerprint(paths, seed=SEED):
+    """Stable id for a file list, used to key on-disk caches built from it."""
+    digest = hashlib.sha1(str(seed).encode())
+    for path in paths:
+        digest.update(path.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def load_image_array(path):
+    """Preprocess a file the way the app does: RGB, 224x224, scaled to [0, 1]."""
+    return to_model_input(load(path, IMG_SIZE))
+
+
+def iter_batches(paths, labels, batch_size=BATCH_SIZE):
+    for i in range(0, len(paths), batch_size):
+        batch = np.stack([load_image_array(p) for p in paths[i:i + batch_size]])
+        yield batch, np.asarray(labels[i:i + batch_size])
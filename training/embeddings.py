@@ -0,0 +1,115 @@
+"""Pooled backbone embeddings, computed once per backbone and memory-mapped from disk.
+
+The backbones are frozen, so running every image through them on every epoch
+(as smart.ipynb does) repeats the same work up to 30 times. Instead each image
+is embedded once per view: view 0 is the image as is, views 1..N are fixed
+random augmentations (rotation, flip, brightness, the notebook's ranges). Each
+view is one .npy shard under cache/embeddings/<backbone>/<split>/, opened with
+mmap_mode="r" so only the rows a batch needs are read.
+"""
+import json
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageEnhance
+
+from preprocessing import load, to_model_input
+from training.dataset import BATCH_SIZE, IMG_SIZE, SEED, fingerprint
+
+CACHE_DIR = os.path.join("cache", "embeddings")
+# Augmented views per training image, besides the original
+VIEWS = 4
+DECODE_WORKERS = min(8, (os.cpu_count() or 1) + 4)
+# Stored as float16, half the disk and page cache; the head trains in float32
+DTYPE = np.float16
+
+ROTATION = 20
+BRIGHTNESS = (0.8, 1.2)
+
+
+def augment(img, rng):
+    img = img.rotate(rng.uniform(-ROTATION, ROTATION), resample=Image.BILINEAR)
+    if rng.random() < 0.5:
+        img = img.transpose(Image.FLIP_LEFT_RIGHT)
+    return ImageEnhance.Brightness(img).enhance(rng.uniform(*BRIGHTNESS))
+
+
+def load_view(path, view, seed=SEED):
+    """Model input for one view of an image, the same array on every run."""
+    img = load(path, IMG_SIZE)
+    if view:
+        img = augment(img, random.Random(f"{seed}:{view}:{path}"))
+    return to_model_input(img)
+
+
+def _split_dir(backbone_name, split, cache_dir):
+    return os.path.join(cache_dir, backbone_name, split)
+
+
+def _read_meta(directory):
+    path = os.path.join(directory, "meta.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_meta(directory, meta):
+    tmp = os.path.join(directory, "meta.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, os.path.join(directory, "meta.json"))
+
+
+def compute_split(backbone, backbone_name, split, paths, labels, views=0, batch_size=BATCH_SIZE,
+                  cache_dir=CACHE_DIR, seed=SEED):
+    """Embed `paths` for views 0..`views` unless the cache already has them.
+
+    The cache is keyed on the file list and seed, a different split or dataset
+    starts over. Finished views are kept, so an interrupted run resumes.
+    """
+    directory = _split_dir(backbone_name, split, cache_dir)
+    os.makedirs(directory, exist_ok=True)
+    key = fingerprint(paths, seed)
+    meta = _read_meta(directory)
+    if meta is None or meta["fingerprint"] != key:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        meta = {"fingerprint": key, "count": len(paths), "dim": None, "views": []}
+        np.save(os.path.join(directory, "labels.npy"), np.asarray(labels, dtype=np.int64))
+        _write_meta(directory, meta)
+
+    with ThreadPoolExecutor(max_workers=DECODE_WORKERS) as pool:
+        for view in range(views + 1):
+            if view in meta["views"]:
+                continue
+            shard = None
+            for start in range(0, len(paths), batch_size):
+                chunk = paths[start:start + batch_size]
+                batch = np.stack(list(pool.map(lambda p: load_view(p, view, seed), chunk)))
+                embeddings = np.asarray(backbone.predict_on_batch(batch))
+                if shard is None:
+                    meta["dim"] = int(embeddings.shape[1])
+                    shard = np.lib.format.open_memmap(
+                        os.path.join(directory, f"view{view}.npy.tmp"), mode="w+", dtype=DTYPE,
+                        shape=(len(paths), meta["dim"]),
+                    )
+                shard[start:start + len(chunk)] = embeddings
+            shard.flush()
+            del shard
+            os.replace(os.path.join(directory, f"view{view}.npy.tmp"), os.path.join(directory, f"view{view}.npy"))
+            meta["views"].append(view)
+            _write_meta(directory, meta)
+            print(f"{backbone_name}/{split}: view {view} embedded ({len(paths)} images)")
+
+
+def load_split(backbone_name, split, cache_dir=CACHE_DIR):
+    """([memory-mapped (n, dim) array per view], labels) for a computed split."""
+    directory = _split_dir(backbone_name, split, cache_dir)
+    meta = _read_meta(directory)
+    if meta is None:
+        raise FileNotFoundError(f"No embeddings for {backbone_name}/{split}, run compute_split first")
+    views = [np.load(os.path.join(directory, f"view{v}.npy"), mmap_mode="r") for v in sorted(meta["views"])]
+    return views, np.load(os.path.join(directory, "labels.npy"))
@@ -0,0 +1,240 @@
+"""SQLite manifest of the image dataset: files, content hashes and stored splits.
+
+    python -m training.manifest                # index (incrementally) and summarize
+    python -m training.manifest --full         # re-stat every file, not just changed folders
+
+Only class subfolders whose mtime changed since the last run are listed
+again, and only new or modified files (size/mtime) are hashed, so preparing
+the dataset stays fast as it grows. A file's split is assigned once and then
+kept: the first build makes a stratified split with build_img_dataset's
+ratios and seed, and images added later are placed by their content hash.
+The first split is over files in path order, so it is not the same as the
+split build_img_dataset(use_manifest=False) makes from os.listdir order.
+Byte-identical copies are recorded as duplicates of the copy that already
+has a split (or else the first by path) and left out of every split.
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+SUBFOLDERS = ("default", "real_world")
+SPLITS = ("train", "valid", "test")
+MANIFEST_NAME = "manifest.db"
+HASH_WORKERS = min(8, (os.cpu_count() or 1) + 4)
+
+
+def manifest_path(dataset_dir):
+    # images/images -> images/manifest.db, next to the data it describes
+    return os.path.join(os.path.dirname(os.path.normpath(dataset_dir)), MANIFEST_NAME)
+
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS directories (
+            path TEXT PRIMARY KEY,
+            mtime REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS images (
+            path TEXT PRIMARY KEY,
+            directory TEXT NOT NULL,
+            class_name TEXT NOT NULL,
+            subfolder TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            sha256 TEXT NOT NULL,
+            split TEXT,
+            duplicate_of TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_images_directory ON images (directory);
+        CREATE INDEX IF NOT EXISTS idx_images_sha256 ON images (sha256);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """)
+    return conn
+
+
+def sha256sum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _scan_directory(conn, directory, class_name, subfolder):
+    known = {path: (size, mtime) for path, size, mtime in conn.execute(
+        "SELECT path, size, mtime FROM images WHERE directory = ?", (directory,))}
+    seen, stale = set(), []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            seen.add(entry.path)
+            if known.get(entry.path) != (stat.st_size, stat.st_mtime):
+                stale.append((entry.path, stat.st_size, stat.st_mtime))
+
+    removed = [path for path in known if path not in seen]
+    conn.executemany("DELETE FROM images WHERE path = ?", [(path,) for path in removed])
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+        hashes = list(pool.map(sha256sum, [path for path, _, _ in stale]))
+    # A modified file keeps its path but gets a new hash, and a new split below
+    conn.executemany(
+        "INSERT OR REPLACE INTO images (path, directory, class_name, subfolder, size, mtime, sha256) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(path, directory, class_name, subfolder, size, mtime, digest)
+         for (path, size, mtime), digest in zip(stale, hashes)],
+    )
+    return len(stale), len(removed)
+
+
+def scan(conn, dataset_dir, full=False):
+    """Bring the manifest up to date with `dataset_dir`, returns counts."""
+    known_dirs = dict(conn.execute("SELECT path, mtime FROM directories"))
+    stats = {"directories": 0, "rescanned": 0, "updated": 0, "removed": 0}
+    present = set()
+    for class_name in sorted(os.listdir(dataset_dir)):
+        class_path = os.path.join(dataset_dir, class_name)
+        if not os.path.isdir(class_path):
+            continue
+        for subfolder in SUBFOLDERS:
+            directory = os.path.join(class_path, subfolder)
+            if not os.path.isdir(directory):
+                continue
+            present.add(directory)
+            stats["directories"] += 1
+            # Adding, removing or renaming files bumps the folder's mtime
+            mtime = os.stat(directory).st_mtime
+            if not full and known_dirs.get(directory) == mtime:
+                continue
+            updated, removed = _scan_directory(conn, directory, class_name, subfolder)
+            conn.execute("INSERT OR REPLACE INTO directories (path, mtime) VALUES (?, ?)", (directory, mtime))
+            stats["rescanned"] += 1
+            stats["updated"] += updated
+            stats["removed"] += removed
+
+    for directory in set(known_dirs) - present:
+        stats["removed"] += conn.execute("DELETE FROM images WHERE directory = ?", (directory,)).rowcount
+        conn.execute("DELETE FROM directories WHERE path = ?", (directory,))
+    conn.commit()
+    return stats
+
+
+def mark_duplicates(conn):
+    """One file per hash is the original, the others point to it.
+
+    A file that already has a split stays the original, so a copy added
+    later never takes its place, even if its path sorts first.
+    """
+    conn.execute("""
+        UPDATE images SET duplicate_of = NULLIF(
+            (SELECT other.path FROM images AS other WHERE other.sha256 = images.sha256
+             ORDER BY other.split IS NULL, other.path LIMIT 1), path)
+    """)
+    # Duplicates never train or evaluate, an original that was one gets a split below
+    conn.execute("UPDATE images SET split = NULL WHERE duplicate_of IS NOT NULL")
+    conn.commit()
+
+
+def _hash_split(digest, split_ratio):
+    position = int(digest[:8], 16) / 0x100000000
+    if position < split_ratio[0]:
+        return "train"
+    return "valid" if position < split_ratio[0] + split_ratio[1] else "test"
+
+
+def assign_splits(conn, split_ratio=(0.7, 0.2, 0.1), seed=42):
+    """Give unassigned images a split, without moving any image already assigned."""
+    stored = dict(conn.execute("SELECT key, value FROM meta"))
+    if "split_ratio" in stored:
+        split_ratio = tuple(float(r) for r in stored["split_ratio"].split(","))
+    rows = conn.execute(
+        "SELECT path, class_name, sha256 FROM images WHERE split IS NULL AND duplicate_of IS NULL ORDER BY path"
+    ).fetchall()
+    if not rows:
+        return 0
+
+    if "split_ratio" not in stored:
+        # First build: stratified like build_img_dataset, over files in path order
+        from sklearn.model_selection import train_test_split
+
+        paths = [path for path, _, _ in rows]
+        classes = [class_name for _, class_name, _ in rows]
+        train, rest, _, rest_classes = train_test_split(
+            paths, classes, test_size=1 - split_ratio[0], stratify=classes, random_state=seed
+        )
+        valid, test = train_test_split(
+            rest, test_size=split_ratio[2] / (split_ratio[1] + split_ratio[2]), stratify=rest_classes,
+            random_state=seed
+        )
+        assignments = [(split, path) for split, paths in zip(SPLITS, (train, valid, test)) for path in paths]
+        conn.execute("INSERT INTO meta (key, value) VALUES ('split_ratio', ?)", (",".join(map(str, split_ratio)),))
+        conn.execute("INSERT INTO meta (key, value) VALUES ('seed', ?)", (str(seed),))
+    else:
+        assignments = [(_hash_split(digest, split_ratio), path) for path, _, digest in rows]
+
+    conn.executemany("UPDATE images SET split = ? WHERE path = ?", assignments)
+    conn.commit()
+    return len(assignments)
+
+
+def update(dataset_dir, split_ratio=(0.7, 0.2, 0.1), seed=42, full=False):
+    """Scan, dedupe and split; returns the open connection and scan counts."""
+    conn = connect(manifest_path(dataset_dir))
+    stats = scan(conn, dataset_dir, full)
+    if stats["updated"] or stats["removed"] or full:
+        mark_duplicates(conn)
+    stats["assigned"] = assign_splits(conn, split_ratio, seed)
+    return conn, stats
+
+
+def load_dataset(dataset_dir, split_ratio=(0.7, 0.2, 0.1), seed=42, full=False):
+    """build_img_dataset's return value, read from the manifest."""
+    conn, stats = update(dataset_dir, split_ratio, seed, full)
+    try:
+        class_names = [name for name, in conn.execute("SELECT DISTINCT class_name FROM images ORDER BY class_name")]
+        index = {name: i for i, name in enumerate(class_names)}
+        result = []
+        for split in SPLITS:
+            rows = conn.execute("SELECT path, class_name FROM images WHERE split = ? ORDER BY path", (split,)).fetchall()
+            result += [[path for path, _ in rows], [index[name] for _, name in rows]]
+    finally:
+        conn.close()
+    print(f"Manifest: {stats['rescanned']}/{stats['directories']} folders rescanned, "
+          f"{stats['updated']} files (re)hashed, {stats['removed']} removed, {stats['assigned']} newly split")
+    return tuple(result) + (class_names,)
+
+
+def summary(conn):
+    return {
+        "splits": dict(conn.execute("SELECT COALESCE(split, 'none'), COUNT(*) FROM images GROUP BY 1")),
+        "duplicates": conn.execute("SELECT COUNT(*) FROM images WHERE duplicate_of IS NOT NULL").fetchone()[0],
+        # Same bytes filed under two classes, a labelling error
+        "conflicts": conn.execute("""
+            SELECT d.path, d.class_name, o.path, o.class_name FROM images AS d
+            JOIN images AS o ON o.path = d.duplicate_of WHERE o.class_name != d.class_name
+        """).fetchall(),
+    }
+
+
+if __name__ == "__main__":
+    from training.dataset import DATASET_DIR, SEED
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", default=DATASET_DIR)
+    parser.add_argument("--full", action="store_true", help="re-stat every file")
+    args = parser.parse_args()
+
+    conn, stats = update(args.dataset, seed=SEED, full=args.full)
+    info = summary(conn)
+    print(f"{stats['rescanned']}/{stats['directories']} folders rescanned, {stats['updated']} files hashed, "
+          f"{stats['removed']} removed, {stats['assigned']} newly split")
+    print(f"Splits: {info['splits']}, duplicates: {info['duplicates']}")
+    for dup, dup_class, original, original_class in info["conflicts"]:
+        print(f"  {dup} ({dup_class}) is identical to {original} ({original_class})")
@@ -0,0 +1,50 @@
+"""Candidate backbones and the classification head from smart.ipynb."""
+from training.dataset import IMG_SIZE
+
+INPUT_SHAPE = IMG_SIZE + (3,)
+# Name -> tf.keras.applications constructor, same candidates as the notebook
+BACKBONES = {
+    "EfficientNetV2": "EfficientNetV2S",
+    "DenseNet201": "DenseNet201",
+    "ResNet50V2": "ResNet50V2",
+}
+HEAD_UNITS = 512
+DROPOUT = 0.4
+
+
+def build_backbone(name):
+    """Frozen ImageNet backbone with global average pooling: images -> embeddings."""
+    import tensorflow as tf
+
+    base = getattr(tf.keras.applications, BACKBONES[name])(
+        weights="imagenet", include_top=False, input_shape=INPUT_SHAPE
+    )
+    base.trainable = False
+    pooled = tf.keras.layers.GlobalAveragePooling2D()(base.output)
+    return tf.keras.Model(base.input, pooled, name=f"{name}_embedding")
+
+
+def build_head(embedding_dim, num_classes):
+    """Dense(512) -> Dropout -> Dense(num_classes), trained on cached embeddings."""
+    import tensorflow as tf
+
+    inputs = tf.keras.Input((embedding_dim,))
+    x = tf.keras.layers.Dense(HEAD_UNITS, activation="relu")(inputs)
+    x = tf.keras.layers.Dropout(DROPOUT)(x)
+    outputs = tf.keras.layers.Dense(num_classes, activation="softmax")(x)
+    return tf.keras.Model(inputs, outputs, name="head")
+
+
+def build_model(backbone, head):
+    """Backbone + head as one image -> probabilities model, the layout the app loads.
+
+    The head's layers are applied one by one rather than nested as a submodel,
+    so the graph matches the notebook's models: layers[-2] is the Dropout after
+    Dense(512), whose output the app uses as the image embedding.
+    """
+    import tensorflow as tf
+
+    x = backbone.output
+    for layer in head.layers[1:]:
+        x = layer(x)
+    return tf.keras.Model(backbone.input, x)
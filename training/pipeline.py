@@ -0,0 +1,92 @@
+"""tf.data input pipeline over the build_img_dataset file lists.
+
+Replaces the notebook's ImageDataGenerator.flow_from_dataframe, which decodes
+and augments one image at a time in Python. Here JPEG/PNG decode and resize
+run in parallel, decoded images are cached on disk (cache/tfdata/), and
+augmentation is applied to whole batches on the graph side:
+
+    train = make_dataset(X_train, y_train, len(class_names), training=True)
+    valid = make_dataset(X_valid, y_valid, len(class_names))
+    model.fit(train, validation_data=valid, ...)
+    report = evaluate(model, X_test, y_test, class_names)
+
+Images come out as float32 in [0, 1] with one-hot labels, exactly what the
+notebook's generator (rescale=1/255, class_mode="categorical") produced.
+"""
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from training.dataset import BATCH_SIZE, IMG_SIZE, SEED, fingerprint
+
+AUTOTUNE = tf.data.AUTOTUNE
+CACHE_DIR = os.path.join("cache", "tfdata")
+
+# Same ranges as the notebook's create_datagen(augment=True)
+ROTATION = 20
+BRIGHTNESS = (0.8, 1.2)
+
+
+def decode(path, label):
+    image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+    image = tf.image.resize(image, IMG_SIZE)
+    return tf.cast(image, tf.float32) / 255.0, label
+
+
+def make_augment(seed=SEED):
+    """Batch augmentation: rotation, horizontal flip, brightness, all vectorized."""
+    layers = tf.keras.Sequential([
+        tf.keras.layers.RandomRotation(ROTATION / 360, fill_mode="nearest", seed=seed),
+        tf.keras.layers.RandomFlip("horizontal", seed=seed),
+    ])
+
+    def augment(images, labels):
+        images = layers(images, training=True)
+        # ImageDataGenerator's brightness_range scales pixel values per image
+        factors = tf.random.uniform((tf.shape(images)[0], 1, 1, 1), *BRIGHTNESS)
+        return tf.clip_by_value(images * factors, 0.0, 1.0), labels
+
+    return augment
+
+
+def make_dataset(paths, labels, num_classes, training=False, batch_size=BATCH_SIZE, cache=True,
+                 cache_dir=CACHE_DIR, seed=SEED):
+    """Batched (images, one-hot labels) dataset.
+
+    `cache` keeps decoded, resized images in a file keyed on the file list, so
+    only the first epoch (of the first run) decodes JPEGs. Training datasets are
+    shuffled each epoch and augmented after batching; evaluation datasets keep
+    file order so predictions line up with `labels`.
+    """
+    ds = tf.data.Dataset.from_tensor_slices((list(paths), tf.one_hot(labels, num_classes)))
+    ds = ds.map(decode, num_parallel_calls=AUTOTUNE, deterministic=not training)
+    if cache:
+        os.makedirs(cache_dir, exist_ok=True)
+        ds = ds.cache(os.path.join(cache_dir, fingerprint(paths, seed)))
+    if training:
+        ds = ds.shuffle(min(len(paths), 4096), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size)
+    if training:
+        ds = ds.map(make_augment(seed), num_parallel_calls=AUTOTUNE)
+    return ds.prefetch(AUTOTUNE)
+
+
+def evaluate(model, paths, labels, class_names, batch_size=BATCH_SIZE):
+    """Accuracy, confusion matrix and classification report on the eval pipeline.
+
+    The report comes both as text and as {class: {precision, recall, ...}}.
+    """
+    from sklearn.metrics import classification_report, confusion_matrix
+
+    ds = make_dataset(paths, labels, len(class_names), batch_size=batch_size)
+    y_pred = np.argmax(model.predict(ds, verbose=0), axis=1)
+    y_true = np.asarray(labels)
+    report_args = dict(labels=range(len(class_names)), target_names=class_names, zero_division=0)
+    return {
+        "accuracy": float(np.mean(y_pred == y_true)),
+        "confusion_matrix": confusion_matrix(y_true, y_pred, labels=range(len(class_names))),
+        "report": classification_report(y_true, y_pred, **report_args),
+        "per_class": classification_report(y_true, y_pred, output_dict=True, **report_args),
+        "y_pred": y_pred,
+    }
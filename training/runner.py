@@ -0,0 +1,134 @@
+"""Train and evaluate the candidate backbones in parallel worker processes.
+
+    python -m training.runner                                   # all candidates, one worker each
+    python -m training.runner --workers 2 --threads 8           # 2 at a time, 8 threads each
+
+Each worker is a fresh (spawned) process whose TensorFlow intra-op/inter-op
+thread pools are sized before TensorFlow starts, so the candidates share the
+machine instead of each assuming it owns every core. Workers run
+training.train_heads, which saves saved_models/{name}.keras and
+saved_histories/{name}_history.pkl and evaluates the saved model on the test
+split. Inference latency is measured afterwards, one model at a time, so
+training load doesn't skew it. The comparison, including each model's
+confusion matrix and per-class report, is written to
+saved_models/comparison.json.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from inference_backends import set_thread_budget
+from training.dataset import DATASET_DIR, build_img_dataset
+from training.embeddings import VIEWS
+from training.models import BACKBONES, INPUT_SHAPE
+
+REPORT_PATH = os.path.join("saved_models", "comparison.json")
+LATENCY_RUNS = 20
+
+
+def train_worker(name, splits, class_names, threads, views, epochs=None):
+    set_thread_budget(threads)
+    from training import train_heads
+
+    start = time.perf_counter()
+    result = train_heads.run(name, splits, class_names, views, epochs=epochs or train_heads.EPOCHS)
+    return {
+        "name": name,
+        "test_accuracy": result["test_accuracy"],
+        "best_val_accuracy": max(result["history"]["val_accuracy"]),
+        "epochs": len(result["history"]["loss"]),
+        "head_train_seconds": result["train_seconds"],
+        "total_seconds": time.perf_counter() - start,
+        # Rows are true classes, columns predicted, both in class_names order
+        "class_names": list(class_names),
+        "confusion_matrix": result["confusion_matrix"].tolist(),
+        "per_class": result["per_class"],
+    }
+
+
+def latency_worker(name, threads, runs=LATENCY_RUNS):
+    set_thread_budget(threads)
+    import numpy as np
+    import tensorflow as tf
+
+    path = f"saved_models/{name}.keras"
+    model = tf.keras.models.load_model(path, compile=False)
+    batch = np.zeros((1,) + INPUT_SHAPE, dtype=np.float32)
+    model.predict_on_batch(batch)  # build the graph outside the timed runs
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        model.predict_on_batch(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "latency_p50_ms": float(np.percentile(timings, 50)),
+        "latency_p95_ms": float(np.percentile(timings, 95)),
+        "size_mb": os.path.getsize(path) / 1e6,
+        "parameters": int(model.count_params()),
+    }
+
+
+def run(names, splits, class_names, workers, threads, views=VIEWS, epochs=None):
+    # spawn: every worker imports TensorFlow itself, nothing inherited from the parent
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {
+            pool.submit(train_worker, name, splits, class_names, threads, views, epochs): name
+            for name in names
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+                print(f"{name}: done, test accuracy {results[name]['test_accuracy']:.4f}")
+            except Exception as e:
+                # One failed candidate should not lose the others' results
+                print(f"{name}: failed: {e}")
+                results[name] = {"name": name, "error": str(e)}
+
+    # One model at a time with the whole machine, latency comparable across candidates
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        for name, result in results.items():
+            if "error" not in result:
+                result.update(pool.submit(latency_worker, name, os.cpu_count() or 1).result())
+    return [results[name] for name in names]
+
+
+def write_report(rows, path=REPORT_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2)
+
+    print(f"\n{'model':<16}{'test acc':>10}{'p50 ms':>10}{'p95 ms':>10}{'size MB':>10}{'train s':>10}")
+    for row in rows:
+        if "error" in row:
+            print(f"{row['name']:<16}  failed: {row['error']}")
+            continue
+        print(f"{row['name']:<16}{row['test_accuracy']:>10.4f}{row['latency_p50_ms']:>10.1f}"
+              f"{row['latency_p95_ms']:>10.1f}{row['size_mb']:>10.1f}{row['total_seconds']:>10.0f}")
+    trained = [row for row in rows if "error" not in row]
+    if trained:
+        best = max(trained, key=lambda row: row["test_accuracy"])
+        print(f"\nBest test accuracy: {best['name']} ({best['test_accuracy']:.4f}), report in {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", default=DATASET_DIR)
+    parser.add_argument("--backbones", nargs="+", choices=sorted(BACKBONES), default=list(BACKBONES))
+    parser.add_argument("--workers", type=int, help="candidates trained at once (default: all)")
+    parser.add_argument("--threads", type=int, help="TensorFlow threads per worker (default: cores / workers)")
+    parser.add_argument("--views", type=int, default=VIEWS)
+    parser.add_argument("--epochs", type=int)
+    args = parser.parse_args()
+
+    workers = args.workers or len(args.backbones)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // workers)
+    X_train, y_train, X_valid, y_valid, X_test, y_test, class_names = build_img_dataset(args.dataset)
+    splits = {"train": (X_train, y_train), "valid": (X_valid, y_valid), "test": (X_test, y_test)}
+    print(f"Training {', '.join(args.backbones)}: {workers} workers x {threads} threads")
+    write_report(run(args.backbones, splits, class_names, workers, threads, args.views, args.epochs))
@@ -0,0 +1,123 @@
+"""Train the candidate models' heads on cached backbone embeddings.
+
+    python -m training.train_heads                              # all three backbones
+    python -m training.train_heads --backbones DenseNet201 --views 8
+
+Backbone embeddings are computed on the first run (see training/embeddings.py)
+and reused afterwards, so each epoch only trains Dense(512) -> Dropout ->
+Dense(30). Saves saved_models/{name}.keras (backbone + head, what the app
+loads) and saved_histories/{name}_history.pkl like smart.ipynb, then evaluates
+the saved model on the test images through the tf.data pipeline
+(training/pipeline.py) for accuracy, a confusion matrix and a per-class report.
+"""
+import argparse
+import os
+import pickle
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from training import embeddings, pipeline
+from training.dataset import BATCH_SIZE, DATASET_DIR, SEED, build_img_dataset
+from training.models import BACKBONES, build_backbone, build_head, build_model
+
+EPOCHS = 30
+PATIENCE = 3
+# Embeddings are tiny next to images, bigger batches keep the CPU busy
+HEAD_BATCH_SIZE = 256
+
+
+class EmbeddingViews(tf.keras.utils.Sequence):
+    """Batches of training embeddings, one randomly chosen view per image and epoch."""
+
+    def __init__(self, views, labels, batch_size=HEAD_BATCH_SIZE, seed=SEED, **kwargs):
+        super().__init__(**kwargs)
+        self.views = views
+        self.labels = labels
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        self.on_epoch_end()
+
+    def __len__(self):
+        return -(-len(self.labels) // self.batch_size)
+
+    def __getitem__(self, index):
+        # Sorted indices keep memory-mapped reads sequential
+        idx = np.sort(self.order[index * self.batch_size:(index + 1) * self.batch_size])
+        choice = self.view_of[idx]
+        batch = np.empty((len(idx), self.views[0].shape[1]), dtype=np.float32)
+        for view in np.unique(choice):
+            mask = choice == view
+            batch[mask] = self.views[view][idx[mask]]
+        return batch, self.labels[idx]
+
+    def on_epoch_end(self):
+        self.order = self.rng.permutation(len(self.labels))
+        self.view_of = self.rng.integers(len(self.views), size=len(self.labels))
+
+
+def embed(name, splits, views, batch_size):
+    backbone = build_backbone(name)
+    start = time.perf_counter()
+    for split, (paths, labels) in splits.items():
+        embeddings.compute_split(backbone, name, split, paths, labels, views if split == "train" else 0, batch_size)
+    print(f"{name}: embeddings ready in {time.perf_counter() - start:.1f}s")
+    return backbone
+
+
+def train_head(name, num_classes, epochs=EPOCHS):
+    train_views, y_train = embeddings.load_split(name, "train")
+    valid_views, y_valid = embeddings.load_split(name, "valid")
+    head = build_head(train_views[0].shape[1], num_classes)
+    head.compile(optimizer="adam", loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+    early_stopping = tf.keras.callbacks.EarlyStopping(monitor="val_accuracy", patience=PATIENCE,
+                                                      restore_best_weights=True)
+    history = head.fit(
+        EmbeddingViews(train_views, y_train),
+        validation_data=(np.asarray(valid_views[0], dtype=np.float32), y_valid),
+        epochs=epochs,
+        callbacks=[early_stopping],
+    )
+    return head, history.history
+
+
+def save(name, backbone, head, history):
+    os.makedirs("saved_models", exist_ok=True)
+    os.makedirs("saved_histories", exist_ok=True)
+    model = build_model(backbone, head)
+    model.save(f"saved_models/{name}.keras")
+    with open(f"saved_histories/{name}_history.pkl", "wb") as f:
+        pickle.dump(history, f)
+    print(f"{name} model and history saved successfully.")
+    return model
+
+
+def run(name, splits, class_names, views=embeddings.VIEWS, batch_size=BATCH_SIZE, epochs=EPOCHS):
+    backbone = embed(name, splits, views, batch_size)
+    start = time.perf_counter()
+    head, history = train_head(name, len(class_names), epochs)
+    train_seconds = time.perf_counter() - start
+    print(f"{name}: head trained in {train_seconds:.1f}s")
+    model = save(name, backbone, head, history)
+
+    # The full image -> probabilities model, on test images decoded by the eval pipeline
+    test_paths, test_labels = splits["test"]
+    evaluation = pipeline.evaluate(model, test_paths, test_labels, class_names, batch_size)
+    print(f"{name}: test accuracy {evaluation['accuracy']:.4f}\n{evaluation['report']}")
+    return {"history": history, "train_seconds": train_seconds, "test_accuracy": evaluation["accuracy"],
+            "confusion_matrix": evaluation["confusion_matrix"], "per_class": evaluation["per_class"]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", default=DATASET_DIR)
+    parser.add_argument("--backbones", nargs="+", choices=sorted(BACKBONES), default=list(BACKBONES))
+    parser.add_argument("--views", type=int, default=embeddings.VIEWS, help="augmented views per training image")
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    args = parser.parse_args()
+
+    X_train, y_train, X_valid, y_valid, X_test, y_test, class_names = build_img_dataset(args.dataset)
+    splits = {"train": (X_train, y_train), "valid": (X_valid, y_valid), "test": (X_test, y_test)}
+    for name in args.backbones:
+        run(name, splits, class_names, args.views, epochs=args.epochs)
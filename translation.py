@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+
+import db
+import profiling
+import ui_catalog
+from cache_utils import LRUCache
+
+# Seconds to wait for the translation backend before falling back to English
+TRANSLATE_TIMEOUT = float(os.environ.get("TRANSLATE_TIMEOUT", "5"))
+# After a backend failure, don't try again for this many seconds
+RETRY_AFTER = 60
+# Characters per Google request, well under the endpoint's 5000 limit
+MAX_REQUEST_CHARS = 4500
+
+
+class GoogleBackend:
+    """googletrans, one request per chunk of texts rather than per text.
+
+    googletrans 4.0.0rc1 loops over a list and sends a request per string, so
+    the texts are joined on newlines (which Google keeps in place) into chunks
+    of up to MAX_REQUEST_CHARS and split again. A text with newlines of its own
+    is sent alone, and a chunk that doesn't come back as the same number of
+    lines is redone one text at a time.
+    """
+
+    def __init__(self):
+        self._translator = None
+
+    def _translate(self, text, dest_lang):
+        if self._translator is None:
+            from googletrans import Translator
+            self._translator = Translator(timeout=TRANSLATE_TIMEOUT)
+        return self._translator.translate(text, dest=dest_lang).text
+
+    def _translate_chunk(self, texts, dest_lang):
+        lines = self._translate("\n".join(texts), dest_lang).split("\n")
+        if len(lines) != len(texts):
+            return [self._translate(text, dest_lang) for text in texts]
+        return [line.strip() for line in lines]
+
+    def translate_many(self, texts, dest_lang):
+        texts = list(texts)
+        translated = [None] * len(texts)
+        chunks, size = [[]], 0
+        for i, text in enumerate(texts):
+            if "\n" in text:
+                translated[i] = self._translate(text, dest_lang)
+                continue
+            if chunks[-1] and size + len(text) + 1 > MAX_REQUEST_CHARS:
+                chunks.append([])
+                size = 0
+            chunks[-1].append(i)
+            size += len(text) + 1
+        for chunk in filter(None, chunks):
+            for i, line in zip(chunk, self._translate_chunk([texts[i] for i in chunk], dest_lang)):
+                translated[i] = line
+        return translated
+
+
+class StubBackend:
+    """Offline translator for tests, just tags the text with the language."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def translate_many(self, texts, dest_lang):
+        self.calls += 1
+        return [f"[{dest_lang}] {text}" for text in texts]
+
+
+BACKENDS = {
+    "google": GoogleBackend,
+    "stub": StubBackend,
+}
+
+
+class TranslationCache:
+    """(text, dest_lang) -> translation, LRU in memory with SQLite behind it.
+
+    `translate()` never calls the backend: a miss returns the source text and is
+    queued, and `flush()` translates everything queued in one batched call.
+    """
+
+    def __init__(self, backend, maxsize=4096):
+        self.backend = backend
+        self.memory = LRUCache(maxsize)
+        self.backend_calls = 0
+        self.backend_errors = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._failed_at = None
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                source TEXT,
+                dest_lang TEXT,
+                translated TEXT,
+                PRIMARY KEY (source, dest_lang)
+            ) WITHOUT ROWID
+        """)
+
+    def lookup(self, text, dest_lang):
+        # Static UI strings come from the pretranslated catalog
+        translated = ui_catalog.lookup(text, dest_lang)
+        if translated is not None:
+            return translated
+        key = (text, dest_lang)
+        translated = self.memory.get(key)
+        if translated is not None:
+            return translated
+        row = db.query_one("SELECT translated FROM translations WHERE source = ? AND dest_lang = ?", key)
+        if row is not None:
+            self.memory.put(key, row[0])
+            return row[0]
+        return None
+
+    def store(self, pairs, dest_lang):
+        rows = [(text, dest_lang, translated) for text, translated in pairs]
+        for text, _, translated in rows:
+            self.memory.put((text, dest_lang), translated)
+        db.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?)", rows)
+
+    def translate(self, text, dest_lang="en"):
+        if dest_lang == "en" or not text:
+            return text
+        with profiling.stage("translate"):
+            translated = self.lookup(text, dest_lang)
+        if translated is not None:
+            return translated
+        with self._lock:
+            self._pending.add((text, dest_lang))
+        return text
+
+    def translate_many(self, texts, dest_lang="en"):
+        """Translate a list right away, with a single backend call for all misses."""
+        if dest_lang == "en":
+            return list(texts)
+        found = {text: self.lookup(text, dest_lang) for text in set(texts) if text}
+        misses = [text for text, translated in found.items() if translated is None]
+        if misses:
+            found.update(self._call_backend(misses, dest_lang))
+        return [found.get(text) or text for text in texts]
+
+    def flush(self):
+        """Translate everything queued by `translate()` since the last flush."""
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        by_lang = {}
+        for text, dest_lang in pending:
+            by_lang.setdefault(dest_lang, []).append(text)
+        stored = 0
+        for dest_lang, texts in by_lang.items():
+            stored += len(self._call_backend(texts, dest_lang))
+        return stored
+
+    def _call_backend(self, texts, dest_lang):
+        # Keep the UI responsive while the backend is down: skip it for a while
+        if self._failed_at is not None and time.time() - self._failed_at < RETRY_AFTER:
+            return {}
+        try:
+            self.backend_calls += 1
+            with profiling.stage("translate_backend"):
+                translated = self.backend.translate_many(texts, dest_lang)
+        except Exception:
+            self.backend_errors += 1
+            self._failed_at = time.time()
+            return {}
+        self._failed_at = None
+        pairs = list(zip(texts, translated))
+        self.store(pairs, dest_lang)
+        return dict(pairs)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend = BACKENDS[os.environ.get("TRANSLATOR_BACKEND", "google")]()
+                _cache = TranslationCache(backend)
+    return _cache
+
+
+def set_backend(backend):
+    """Swap the translator, e.g. `set_backend(StubBackend())` in offline tests."""
+    get_cache().backend = backend
+
+
+def translate(text, dest_lang="en"):
+    return get_cache().translate(text, dest_lang)
+
+
+def translate_many(texts, dest_lang="en"):
+    return get_cache().translate_many(texts, dest_lang)
+
+
+def flush_pending():
+    return get_cache().flush()
@@ -0,0 +1,34 @@
+import json
+import os
+
+# Pretranslated static UI strings, generated by build_catalog.py. Layout:
+#   {"source": [text, ...], "hi": [translation, ...], "bn": [...], ...}
+# with every language list aligned to "source".
+CATALOG_PATH = os.environ.get("UI_CATALOG", "ui_catalog.json")
+
+_catalog = None
+
+
+def load(path=CATALOG_PATH):
+    global _catalog
+    catalog = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+        source = raw.pop("source")
+        for lang, translations in raw.items():
+            catalog[lang] = dict(zip(source, translations))
+    _catalog = catalog
+    return catalog
+
+
+def lookup(text, dest_lang):
+    if _catalog is None:
+        load()
+    return _catalog.get(dest_lang, {}).get(text)
+
+
+def languages():
+    if _catalog is None:
+        load()
+    return sorted(_catalog)
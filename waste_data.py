@@ -0,0 +1,79 @@
+# Shared by the Streamlit app, the catalog build step and the inference tools
+
+# Class Names (Based on your dataset)
+class_names = ['aerosol_cans', 'aluminum_food_cans', 'aluminum_soda_cans', 'cardboard_boxes',
+               'cardboard_packaging', 'clothing', 'coffee_grounds', 'disposable_plastic_cutlery',
+               'eggshells', 'food_waste', 'glass_beverage_bottles', 'glass_cosmetic_containers',
+               'glass_food_jars', 'magazines', 'newspaper', 'office_paper', 'paper_cups',
+               'plastic_cup_lids', 'plastic_detergent_bottles', 'plastic_food_containers',
+               'plastic_shopping_bags', 'plastic_soda_bottles', 'plastic_straws', 'plastic_trash_bags',
+               'plastic_water_bottles', 'shoes', 'steel_food_cans', 'styrofoam_cups',
+               'styrofoam_food_containers', 'tea_bags']
+
+# Waste Categories and Upcycling Ideas
+data = {
+    "Plastic": ["Turn bottles into planters", "Make eco-bricks", "Create DIY organizers"],
+    "Paper and Cardboard": ["Make handmade paper", "Create gift wrapping paper", "Use for composting"],
+    "Glass": ["Turn jars into lanterns", "Make decorative vases", "Use broken glass for mosaic art"],
+    "Metal": ["Make tin can lanterns", "Create wall art from soda cans", "Reuse as storage containers"],
+    "Organic Waste": ["Compost food scraps", "Make DIY plant fertilizer", "Use coffee grounds for skin exfoliation"],
+    "Textiles": ["Turn old shirts into tote bags", "Make patchwork quilts", "Upcycle jeans into shorts"],
+    "Styrofoam": ["Reuse for craft projects", "Insulate fragile items", "Create DIY decorations"]
+}
+
+# Waste Type Mapping
+waste_category_mapping = {
+    "Plastic": ['plastic_cup_lids', 'plastic_detergent_bottles', 'plastic_shopping_bags', 'plastic_straws', 'plastic_water_bottles', 'plastic_food_containers', 'plastic_soda_bottles'],
+    "Paper and Cardboard": ['cardboard_boxes', 'cardboard_packaging', 'magazines', 'newspaper', 'office_paper', 'paper_cups'],
+    "Glass": ['glass_beverage_bottles', 'glass_cosmetic_containers', 'glass_food_jars'],
+    "Metal": ['aerosol_cans', 'aluminum_food_cans', 'aluminum_soda_cans', 'steel_food_cans'],
+    "Organic Waste": ['coffee_grounds', 'eggshells', 'food_waste', 'tea_bags'],
+    "Textiles": ['clothing', 'shoes'],
+    "Styrofoam": ['styrofoam_cups', 'styrofoam_food_containers']
+}
+
+# Category Types
+disposal_methods = {
+    "Plastic": "Recyclable",
+    "Paper and Cardboard": "Recyclable",
+    "Glass": "Recyclable",
+    "Metal": "Recyclable",
+    "Organic Waste": "Disposable",
+    "Textiles": "Upcyclable",
+    "Styrofoam": "Upcyclable"
+}
+
+
+def lookup_category(predicted_class):
+    waste_type = "Unknown"
+    for category, items in waste_category_mapping.items():
+        if predicted_class in items:
+            waste_type = category
+            break
+    return waste_type, disposal_methods.get(waste_type, "Unknown")
+
+
+# Level names shown in the sidebar, in order
+LEVEL_NAMES = ["♻️ Eco Rookie", "🌱 Green Guardian", "🌿 Planet Protector", "🌍 Eco Hero"]
+
+
+def get_level(points):
+    if points < 50:
+        return LEVEL_NAMES[0]
+    elif points < 100:
+        return LEVEL_NAMES[1]
+    elif points < 200:
+        return LEVEL_NAMES[2]
+    else:
+        return LEVEL_NAMES[3]
+
+
+def get_progress(points):
+    if points < 50:
+        return points / 50
+    elif points < 100:
+        return (points - 50) / 50
+    elif points < 200:
+        return (points - 100) / 100
+    else:
+        return 1.0
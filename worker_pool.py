@@ -0,0 +1,310 @@
+"""Inference in a pool of worker processes, inputs passed through shared memory.
+
+    INFERENCE_WORKERS=4 INFERENCE_WORKER_THREADS=2 streamlit run app.py
+
+Each worker process loads its own warm copy of the backend and sizes
+TensorFlow's thread pools to its budget, so N concurrent predictions use N
+budgets instead of N threads each fighting over every core. A worker owns one
+input and one output block of shared memory: the caller copies its
+preprocessed (n, 224, 224, 3) batch in, sends only the row count over a pipe,
+and reads the probabilities back out. Only the small extras go through the
+pipe: embeddings (n x 512) and classifier head weights.
+
+WorkerPool has the backend interface (predict, predict_with_embeddings,
+head_weights, set_head_weights, stats), model_registry hands it out instead of
+an in-process backend when INFERENCE_WORKERS is set. A worker process that
+dies is replaced in the background and the request is retried once on
+another worker.
+"""
+import atexit
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import profiling
+from preprocessing import IMAGE_SIZE
+from waste_data import class_names
+
+WORKERS = int(os.environ.get("INFERENCE_WORKERS", "0"))
+# Default: split the cores evenly between workers
+THREADS = int(os.environ.get("INFERENCE_WORKER_THREADS", "0")) or max(1, (os.cpu_count() or 1) // max(WORKERS, 1))
+# Rows per shared input block, larger batches are sent in chunks
+MAX_BATCH = int(os.environ.get("INFERENCE_WORKER_BATCH", "32"))
+
+INPUT_SHAPE = IMAGE_SIZE[::-1] + (3,)
+NUM_CLASSES = len(class_names)
+
+
+def _worker_main(name, keras_path, threads, input_name, output_name, conn):
+    import inference_backends
+
+    inference_backends.set_thread_budget(threads)
+    input_shm = shared_memory.SharedMemory(name=input_name)
+    output_shm = shared_memory.SharedMemory(name=output_name)
+    inputs = np.ndarray((MAX_BATCH,) + INPUT_SHAPE, dtype=np.float32, buffer=input_shm.buf)
+    outputs = np.ndarray((MAX_BATCH, NUM_CLASSES), dtype=np.float32, buffer=output_shm.buf)
+    try:
+        model = inference_backends.load_backend(name, keras_path)
+        model.predict(inputs[:1])  # warm up before reporting ready
+        swappable = hasattr(model, "set_head_weights")
+        conn.send(("ready", {
+            "embeddings": hasattr(model, "predict_with_embeddings"),
+            "head_version": model.head_version if swappable else None,
+        }))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        command, args = message[0], message[1:]
+        try:
+            payload = None
+            if command == "predict":
+                outputs[:args[0]] = model.predict(inputs[:args[0]])
+            elif command == "embed":
+                probs, payload = model.predict_with_embeddings(inputs[:args[0]])
+                outputs[:args[0]] = probs
+            elif command == "get_head":
+                payload = model.head_weights()
+            elif command == "set_head":
+                model.set_head_weights(*args)
+            else:
+                raise ValueError(f"unknown command {command!r}")
+            conn.send(("ok", payload))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+    del inputs, outputs
+    input_shm.close()
+    output_shm.close()
+
+
+class _Worker:
+    def __init__(self, context, index, name, keras_path, threads):
+        self.index = index
+        self.input_shm = shared_memory.SharedMemory(create=True, size=MAX_BATCH * int(np.prod(INPUT_SHAPE)) * 4)
+        self.output_shm = shared_memory.SharedMemory(create=True, size=MAX_BATCH * NUM_CLASSES * 4)
+        self.inputs = np.ndarray((MAX_BATCH,) + INPUT_SHAPE, dtype=np.float32, buffer=self.input_shm.buf)
+        self.outputs = np.ndarray((MAX_BATCH, NUM_CLASSES), dtype=np.float32, buffer=self.output_shm.buf)
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, name=f"inference-worker-{index}", daemon=True,
+            args=(name, keras_path, threads, self.input_shm.name, self.output_shm.name, child_conn),
+        )
+        self.process.start()
+        self.requests = 0
+        self.images = 0
+        self.busy_seconds = 0.0
+        # Which WorkerPool.set_head_weights() call this process has applied
+        self.head_generation = 0
+
+    def wait_ready(self):
+        """The worker's capabilities, once its backend is loaded and warm."""
+        status, info = self.conn.recv()
+        if status != "ready":
+            raise RuntimeError(f"inference worker {self.index} failed to start: {info}")
+        return info
+
+    def call(self, *message):
+        # EOFError / OSError here mean the process is gone
+        self.conn.send(message)
+        status, payload = self.conn.recv()
+        if status != "ok":
+            raise RuntimeError(f"inference worker {self.index}: {payload}")
+        return payload
+
+    def predict(self, batch, embeddings=False):
+        n = len(batch)
+        self.inputs[:n] = batch
+        start = time.perf_counter()
+        payload = self.call("embed" if embeddings else "predict", n)
+        self.busy_seconds += time.perf_counter() - start
+        self.requests += 1
+        self.images += n
+        return self.outputs[:n].copy(), payload
+
+    def close(self):
+        if self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+            self.process.join(timeout=5)
+        del self.inputs, self.outputs
+        for shm in (self.input_shm, self.output_shm):
+            shm.close()
+            shm.unlink()
+
+
+class WorkerPool:
+    """Backend whose predict() runs on whichever worker process is idle."""
+
+    def __init__(self, name, keras_path, workers=WORKERS, threads=THREADS):
+        self.name = f"pool:{name}"
+        # Same model file as the workers' backend, head_tuning keys the saved head weights on it
+        self.path = keras_path
+        self.size = workers
+        self.threads = threads
+        self._backend_name, self._keras_path = name, keras_path
+        # spawn: workers start clean instead of inheriting Streamlit's threads
+        self._context = multiprocessing.get_context("spawn")
+        self.workers = [_Worker(self._context, i, name, keras_path, threads) for i in range(workers)]
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.waiting = 0
+        self.max_waiting = 0
+        self.restarts = 0
+        # Replacements still loading, requests wait for them instead of failing
+        self.respawning = 0
+        self.started = time.time()
+        atexit.register(self.close)
+
+        for worker in self.workers:
+            try:
+                info = worker.wait_ready()
+            except Exception:
+                self.close()
+                raise
+            self._idle.put(worker)
+        self.has_embeddings = info["embeddings"]
+        # Last correction id of the loaded head (see head_tuning.py), None if it can't be swapped
+        self.head_version = info["head_version"]
+        self._head = None
+        self._head_generation = 0
+        print(f"Started {workers} inference workers x {threads} threads for {name}")
+
+    def _acquire(self):
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            with profiling.stage("inference_queue_wait"):
+                while True:
+                    try:
+                        return self._idle.get(timeout=1)
+                    except queue.Empty:
+                        with self._lock:
+                            if not self.workers and not self.respawning:
+                                raise RuntimeError("no inference workers left")
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def _replace(self, worker, error):
+        print(f"Inference worker {worker.index} died ({type(error).__name__}), restarting it")
+        with self._lock:
+            if worker in self.workers:
+                self.workers.remove(worker)
+            self.restarts += 1
+            self.respawning += 1
+        worker.close()
+        threading.Thread(target=self._respawn, args=(worker.index,), name=f"respawn-worker-{worker.index}",
+                         daemon=True).start()
+
+    def _respawn(self, index):
+        worker = None
+        try:
+            worker = _Worker(self._context, index, self._backend_name, self._keras_path, self.threads)
+            worker.wait_ready()
+        except Exception as e:
+            # The pool runs one worker short from now on
+            print(f"Could not restart inference worker {index}: {e}")
+            if worker is not None:
+                worker.close()
+            with self._lock:
+                self.respawning -= 1
+            return
+        with self._lock:
+            self.respawning -= 1
+            if self._closed:
+                worker.close()
+                return
+            self.workers.append(worker)
+        self._idle.put(worker)
+
+    def _sync_head(self, worker):
+        # Weights from set_head_weights() reach each worker before its next request
+        with self._lock:
+            head, generation = self._head, self._head_generation
+        if head is not None and worker.head_generation != generation:
+            worker.call("set_head", *head)
+            worker.head_generation = generation
+
+    def _run(self, fn):
+        """fn(worker) on an idle worker, retried once on another if the process dies."""
+        for attempt in range(2):
+            worker = self._acquire()
+            try:
+                self._sync_head(worker)
+                result = fn(worker)
+            except (EOFError, OSError) as e:
+                self._replace(worker, e)
+                if attempt:
+                    raise RuntimeError(f"inference worker {worker.index} died: {e}")
+                continue
+            except Exception:
+                self._idle.put(worker)
+                raise
+            self._idle.put(worker)
+            return result
+
+    def _predict(self, batch, embeddings):
+        batch = np.asarray(batch, dtype=np.float32)
+        chunks = self._run(lambda worker: [worker.predict(batch[i:i + MAX_BATCH], embeddings)
+                                           for i in range(0, len(batch), MAX_BATCH)])
+        probs = np.concatenate([chunk[0] for chunk in chunks])
+        return probs, np.concatenate([chunk[1] for chunk in chunks]) if embeddings else None
+
+    def predict(self, batch):
+        return self._predict(batch, False)[0]
+
+    def predict_with_embeddings(self, batch):
+        """(probabilities, embeddings), embeddings None if the workers' backend has none."""
+        return self._predict(batch, self.has_embeddings)
+
+    def head_weights(self):
+        return self._run(lambda worker: worker.call("get_head"))
+
+    def set_head_weights(self, kernel, bias):
+        if self.head_version is None:
+            raise RuntimeError(f"{self._backend_name} workers have no swappable classifier head")
+        with self._lock:
+            self._head = (np.asarray(kernel, dtype=np.float32), np.asarray(bias, dtype=np.float32))
+            self._head_generation += 1
+
+    def stats(self):
+        elapsed = time.time() - self.started
+        return {
+            "workers": len(self.workers),
+            "threads_per_worker": self.threads,
+            "restarts": self.restarts,
+            "respawning": self.respawning,
+
+            "queue_depth": self.waiting,
+            "max_queue_depth": self.max_waiting,
+            "idle_workers": self._idle.qsize(),
+            "per_worker": [
+                {
+                    "requests": w.requests,
+                    "images": w.images,
+                    "utilization": round(w.busy_seconds / elapsed, 3) if elapsed else 0.0,
+                    "alive": w.process.is_alive(),
+                }
+                for w in self.workers
+            ],
+        }
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            workers, self.workers = self.workers, []
+        for worker in workers:
+            worker.close()